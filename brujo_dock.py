@@ -1,14 +1,41 @@
 #!/usr/bin/env python3
+import argparse
 import sys
-import gi
-gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk
-from core.dock import BrujoDock
+from core.startup_profiler import profiler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="brujo_dock")
+    parser.add_argument(
+        "--profile-startup", nargs="?", const="-", metavar="REPORT",
+        help="time startup phases, plugins and imports; write a JSON report to REPORT (default: stdout)",
+    )
+    parser.add_argument(
+        "--profile-keep-running", action="store_true",
+        help="with --profile-startup: keep the dock running and write the report on exit",
+    )
+    # GTK options are left for Gtk itself
+    args, _unknown = parser.parse_known_args()
+    return args
+
 
 def main():
-    dock = BrujoDock()
+    args = parse_args()
+    if args.profile_startup:
+        # Before gi is imported, so its import time shows up in the report
+        profiler.start(args.profile_startup, exit_after_first_frame=not args.profile_keep_running)
+
+    with profiler.phase("imports"):
+        import gi
+        gi.require_version('Gtk', '3.0')
+        from gi.repository import Gtk
+        from core.dock import BrujoDock
+        from core.config_store import config_store
+
+    with profiler.phase("dock_init"):
+        dock = BrujoDock()
     Gtk.main()
+    config_store.flush()
 
 if __name__ == "__main__":
     main()
-
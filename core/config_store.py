@@ -0,0 +1,121 @@
+# core/config_store.py
+import atexit
+import copy
+import json
+import os
+import queue
+import tempfile
+import threading
+from gi.repository import GLib
+from .utils import log
+
+# Pin/unpin bursts and settings dialogs touch the same file many times in a row
+SAVE_DELAY_MS = 400
+FLUSH_TIMEOUT_S = 5
+
+
+def write_json_atomic(path, data):
+    write_atomic(path, [json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")])
+
+
+def write_atomic(path, chunks):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    # A crash mid-write leaves the old file in place, never a truncated one
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class ConfigStore:
+    def __init__(self, delay_ms=SAVE_DELAY_MS):
+        self.delay_ms = delay_ms
+        self._pending = {}  # path -> data; later saves replace earlier ones
+        self._timers = {}  # path -> GLib source id
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self.stats = {
+            "requests": 0,
+            "merged": 0,
+            "writes": 0,
+            "errors": 0,
+        }
+
+    def save(self, path, data):
+        self.stats["requests"] += 1
+        if path in self._pending:
+            self.stats["merged"] += 1
+        self._pending[path] = data
+        if path not in self._timers:
+            self._timers[path] = GLib.timeout_add(self.delay_ms, self._on_timeout, path)
+
+    def flush(self):
+        # Called on quit and before configs are read back; waits for the writer
+        for source_id in self._timers.values():
+            GLib.source_remove(source_id)
+        self._timers.clear()
+        for path in list(self._pending):
+            self._submit(path)
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(FLUSH_TIMEOUT_S):
+            log("[CONFIG] Flush timed out", level="WARNING")
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["pending"] = len(self._pending)
+        return stats
+
+    def _on_timeout(self, path):
+        self._timers.pop(path, None)
+        self._submit(path)
+        return False
+
+    def _submit(self, path):
+        data = self._pending.pop(path, None)
+        if data is None:
+            return
+        # Snapshot on the main thread; the caller keeps mutating its dict
+        self._queue.put((path, copy.deepcopy(data)))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            path, data = item
+            try:
+                write_json_atomic(path, data)
+                self.stats["writes"] += 1
+                log("[CONFIG] Saved: %s", path, level="DEBUG")
+            except (OSError, TypeError, ValueError) as e:
+                self.stats["errors"] += 1
+                log("[CONFIG] Cannot write %s: %s", path, e, level="ERROR")
+
+
+config_store = ConfigStore()
+atexit.register(config_store.flush)
@@ -1,9 +1,17 @@
+import cairo
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GLib
-from .settings import load_core
+from .settings import load_core, save_core
+from .config_store import config_store
+from .startup_bundle import startup_bundle
+from .startup_profiler import profiler
 from .strut_manager import StrutManager
-from .utils import init_logger, log
+from .frame_scheduler import FrameScheduler
+from .timer_service import TimerService
+from .text_service import TextService
+from .event_router import EventRouter
+from .utils import init_logger, log, log_enabled, dump_log_buffer
 from .i18n import init_i18n, _, get_available_languages, _detect_language
 
 
@@ -11,13 +19,22 @@ class BrujoDock:
     VERSION = "26.2"
 
     def __init__(self):
-        self._plugin_rects = []  # (plugin, x, y, w, h)
-        system_lang = _detect_language()
-        self.settings = load_core(default_language=system_lang)
-        init_logger(self)
-        init_i18n(self.settings.get("language", None), dock=self)
-
-        log([lang[0] for lang in get_available_languages()])
+        self._layers = {}  # plugin -> (surface, w, h)
+        self._dirty_layers = set()
+        self._dirty_areas = {}  # plugin -> [(x, y, w, h)] to repaint inside a clean layer
+        self._layer_rects = {}  # plugin -> (x, y, w, h)
+        self._layout = []  # (plugin, x, y, w, h)
+        self._monitor_geometry = None  # (x, y, w, h)
+        self._applied_geometry = None  # (x, y, w, h)
+        with profiler.phase("load_core"):
+            system_lang = _detect_language()
+            self.settings = load_core(default_language=system_lang)
+            init_logger(self)
+        with profiler.phase("i18n"):
+            init_i18n(self.settings.get("language", None), dock=self)
+
+        if log_enabled("DEBUG"):
+            log("[I18N] Available: %s", [lang[0] for lang in get_available_languages()], level="DEBUG")
 
         max_radius = max(self.settings.get("dock_padding_x", 16), self.settings.get("dock_padding_y", 4))
         radius = self.settings.get("corner_radius", 4)
@@ -45,48 +62,101 @@ class BrujoDock:
 
         self.window.set_title("BrujoDock")
 
+        screen.connect("monitors-changed", self._on_monitors_changed)
+        screen.connect("size-changed", self._on_monitors_changed)
+
         self.drawing_area = Gtk.DrawingArea()
         self.drawing_area.connect("draw", self.on_draw)
         self.drawing_area.set_events(Gdk.EventMask.BUTTON_PRESS_MASK)
 
         self.strut_manager = StrutManager(self)
+        self.scheduler = FrameScheduler(self, self.settings.get("max_fps", 60))
+        self.timers = TimerService()
+        self.text_service = TextService()
+        self.events = EventRouter(self)
 
         self.window.add(self.drawing_area)
-        self.window.show_all()
+        with profiler.phase("show_window"):
+            self.window.show_all()
 
-        self.load_plugins()
+        with profiler.phase("load_plugins"):
+            self.load_plugins()
         self.drawing_area.connect("button-press-event", self.on_button_press)
-        self.update_geometry()
+        with profiler.phase("update_geometry"):
+            self.update_geometry()
+        profiler.watch_first_frame(self.window, self.drawing_area)
 
     def update_geometry(self):
-        visual = [p for p in self.plugins if p.enabled]
-        if not visual:
-            total_w = self.settings["dock_padding_x"] * 2
-            total_h = self.settings["default_height"] + self.settings["dock_padding_y"] * 2
+        layout, total_w, total_h = self._get_plugin_layout()
+
+        if layout != self._layout:
+            self._layout = layout
+            self._layer_rects = {plugin: (x, y, w, h) for plugin, x, y, w, h in layout}
+            self.events.rebuild(layout)
+            # Plugins may have moved; cached layers stay valid, only compositing is redone
+            self.drawing_area.queue_draw()
+
+        mon_x, mon_y, mon_w, mon_h = self._get_monitor_geometry()
+        x = mon_x + (mon_w - total_w) // 2
+        y = mon_y + mon_h - total_h - 1
+        geometry = (x, y, total_w, total_h)
+
+        applied = self._applied_geometry
+        if geometry == applied:
+            return
+        self._applied_geometry = geometry
+
+        if applied is None or applied[2:] != geometry[2:]:
+            self.window.set_size_request(total_w, total_h)
+        if applied is None or applied[:2] != geometry[:2]:
+            self.window.move(x, y)
+
+        self.strut_manager.update(x, y, total_w, total_h)
+
+    def _get_monitor_geometry(self):
+        if self._monitor_geometry is None:
+            display = Gdk.Display.get_default()
+            monitor = display.get_primary_monitor() or display.get_monitor(0)
+            geom = monitor.get_geometry()
+            self._monitor_geometry = (geom.x, geom.y, geom.width, geom.height)
+        return self._monitor_geometry
+
+    def _on_monitors_changed(self, screen):
+        log("[GEOMETRY] Monitor configuration changed")
+        self._monitor_geometry = None
+        self._applied_geometry = None
+        self.queue_layout()
+
+    def queue_layout(self):
+        self.scheduler.request_layout()
+
+    def queue_redraw(self, plugin=None, area=None):
+        self.scheduler.request_redraw(plugin, area)
+
+    def invalidate(self, plugin=None, areas=None):
+        if plugin is None:
+            self._dirty_layers.update(self.plugins)
+            self.drawing_area.queue_draw()
+            return
+
+        if plugin not in self.plugins:
+            return
+
+        rect = self._layer_rects.get(plugin)
+        if areas and rect is not None and plugin not in self._dirty_layers:
+            self._dirty_areas.setdefault(plugin, []).extend(areas)
+            for ax, ay, aw, ah in areas:
+                self.drawing_area.queue_draw_area(rect[0] + ax, rect[1] + ay, aw, ah)
+            return
+
+        self._dirty_layers.add(plugin)
+        if rect is None:
+            self.drawing_area.queue_draw()
         else:
-            total_w = self.settings["dock_padding_x"]
-            max_h = 0
-            for i, p in enumerate(visual):
-                w, h = p.get_preferred_size()
-                max_h = max(max_h, h)
-                total_w += w
-                if i < len(visual) - 1:
-                    total_w += self.settings["dock_spacing"]
-            total_w += self.settings["dock_padding_x"]
-            total_h = max_h + self.settings["dock_padding_y"] * 2
-
-        self.window.set_size_request(total_w, total_h)
-
-        display = Gdk.Display.get_default()
-        monitor = display.get_primary_monitor()
-        geom = monitor.get_geometry()
-        x = geom.x + (geom.width - total_w) // 2
-        y = geom.y + geom.height - total_h - 1
-        self.window.move(x, y)
-
-        self.strut_manager.update(total_h)
+            self.drawing_area.queue_draw_area(*rect)
 
     def on_draw(self, widget, cr):
+        self.scheduler.note_paint()
         total_w = widget.get_allocated_width()
         total_h = widget.get_allocated_height()
 
@@ -95,28 +165,57 @@ class BrujoDock:
         self._draw_rounded_rectangle(cr, 0, 0, total_w, total_h, radius)
         cr.fill()
 
-        for plugin, x, y, w, h in self._get_plugin_layout(total_w, total_h):
-            self._plugin_rects.append((plugin, x, y, w, h))
-            cr.save()
-            cr.rectangle(x, y, w, h)
-            cr.translate(x, y)
-            cr.clip()
-            plugin.on_draw(cr, w, h)
-            cr.restore()
+        clip_x1, clip_y1, clip_x2, clip_y2 = cr.clip_extents()
+        for plugin, x, y, w, h in self._layout:
+            if w <= 0 or h <= 0:
+                continue
+            if x >= clip_x2 or x + w <= clip_x1 or y >= clip_y2 or y + h <= clip_y1:
+                continue
+            cr.set_source_surface(self._get_layer(widget, plugin, w, h), x, y)
+            cr.paint()
+
+    def _get_layer(self, widget, plugin, w, h):
+        layer = self._layers.get(plugin)
+        areas = self._dirty_areas.pop(plugin, None)
+        if layer is not None and layer[1:] == (w, h) and plugin not in self._dirty_layers:
+            if areas:
+                # Repaint only the requested parts; the plugin can skip anything outside the clip
+                cr = cairo.Context(layer[0])
+                for area in areas:
+                    cr.rectangle(*area)
+                cr.clip()
+                cr.set_operator(cairo.OPERATOR_CLEAR)
+                cr.paint()
+                cr.set_operator(cairo.OPERATOR_OVER)
+                plugin.on_draw(cr, w, h)
+            return layer[0]
+
+        if layer is None or layer[1:] != (w, h):
+            surface = widget.get_window().create_similar_surface(cairo.CONTENT_COLOR_ALPHA, w, h)
+            self._layers[plugin] = (surface, w, h)
+        else:
+            surface = layer[0]
+
+        cr = cairo.Context(surface)
+        cr.set_operator(cairo.OPERATOR_CLEAR)
+        cr.paint()
+        cr.set_operator(cairo.OPERATOR_OVER)
+        plugin.on_draw(cr, w, h)
+        self._dirty_layers.discard(plugin)
+        return surface
 
     def on_button_press(self, widget, event):
-        target_plugin = None
-        for plugin, x, y, w, h in self._plugin_rects:
-            if x <= event.x <= x + w and y <= event.y <= y + h:
-                target_plugin = plugin
-                break
+        if event.button == 3 and event.state & Gdk.ModifierType.CONTROL_MASK:
+            hit = self.events.hit_test(event.x, event.y)
+            self.show_context_menu(event, hit[0] if hit else None)
+            return True
 
+        target_plugin, handled = self.events.dispatch_button_press(event)
+        if handled:
+            return True
         if event.button == 3:
-            if event.state & Gdk.ModifierType.CONTROL_MASK:
-                self.show_context_menu(event, target_plugin)
-            else:
-                if target_plugin and hasattr(target_plugin, 'on_right_click'):
-                    target_plugin.on_right_click(event)
+            if target_plugin and hasattr(target_plugin, 'on_right_click'):
+                target_plugin.on_right_click(event)
             return True
         return False
 
@@ -136,6 +235,10 @@ class BrujoDock:
             settings_item.connect("activate", lambda _: self.open_plugin_settings(plugin))
             menu.append(settings_item)
 
+        diagnostics = Gtk.MenuItem(label=_("Diagnostics"))
+        diagnostics.connect("activate", lambda _: self.show_diagnostics())
+        menu.append(diagnostics)
+
         quit_item = Gtk.MenuItem(label=_("Quit"))
         quit_item.connect("activate", lambda _: Gtk.main_quit())
         menu.append(quit_item)
@@ -159,6 +262,44 @@ class BrujoDock:
         dialog.run()
         dialog.destroy()
 
+    def get_diagnostics(self):
+        diagnostics = {
+            "scheduler": dict(self.scheduler.stats),
+            "strut": dict(self.strut_manager.stats),
+            "timers": self.timers.get_stats(),
+            "text": self.text_service.get_stats(),
+            "events": self.events.get_stats(),
+            "config": config_store.get_stats(),
+            "bundle": startup_bundle.get_stats(),
+        }
+        for plugin in self.plugins:
+            stats = plugin.get_diagnostics()
+            if stats:
+                diagnostics[plugin.get_plugin_name()] = stats
+        return diagnostics
+
+    def show_diagnostics(self):
+        lines = []
+        for section, counters in self.get_diagnostics().items():
+            lines.append(f"[{section}]")
+            for key, value in counters.items():
+                lines.append(f"  {key}: {value}")
+        text = "\n".join(lines)
+        log("[DIAGNOSTICS]\n%s", text, level="INFO")
+        dump_path = dump_log_buffer()
+        if dump_path:
+            text += "\n\n" + _("Log saved to: {path}").format(path=dump_path)
+
+        dialog = Gtk.MessageDialog(
+            transient_for=self.window,
+            message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.CLOSE,
+            text=_("Diagnostics"),
+        )
+        dialog.format_secondary_text(text)
+        dialog.run()
+        dialog.destroy()
+
     def show_settings(self):
         from core.settings_dock import SettingsDialog
 
@@ -179,60 +320,79 @@ class BrujoDock:
             enabled = config.get("enabled", True)
 
             if not enabled:
-                log(f"[PLUGIN] Skipped (disabled): {plugin_name}")
+                log("[PLUGIN] Skipped (disabled): %s", plugin_name)
                 continue
 
             try:
                 plugin_path = os.path.join(plugins_dir, plugin_name, "plugin.py")
                 spec = importlib.util.spec_from_file_location(f"plugins.{plugin_name}.plugin", plugin_path)
                 module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
+                with profiler.phase(f"plugin:{plugin_name}:module"):
+                    spec.loader.exec_module(module)
 
-                plugin = module.Plugin(self)
+                with profiler.phase(f"plugin:{plugin_name}:init"):
+                    plugin = module.Plugin(self)
                 self.plugins.append(plugin)
-                log(f"[PLUGIN] Loaded: {plugin.name} v{plugin.version}")
+                log("[PLUGIN] Loaded: %s v%s", plugin.name, plugin.version)
             except Exception as e:
-                log(f"[PLUGIN] Load error: {plugin_name}: {e}")
+                log("[PLUGIN] Load error: %s: %s", plugin_name, e)
 
     def reload_plugins(self):
         log("[PLUGIN] Plugins reloading...")
+        # New plugin instances read their configs from disk
+        config_store.flush()
+
+        self.scheduler.cancel()
+        self.events.reset()
+        self.scheduler.max_fps = self.settings.get("max_fps", 60)
 
         for plugin in self.plugins:
+            try:
+                plugin.unload()
+            except Exception as e:
+                log("[PLUGIN] Unload error: %s: %s", plugin.name, e)
             try:
                 if hasattr(plugin, '__del__'):
                     plugin.__del__()
             except:
                 pass
         self.plugins.clear()
+        self._layers.clear()
+        self._layer_rects.clear()
+        self._dirty_layers.clear()
+        self._dirty_areas.clear()
+        self._layout = []
+        self._applied_geometry = None
 
         self.drawing_area.queue_draw()
 
         self.load_plugins()
 
-        self.update_geometry()
-        self.drawing_area.queue_draw()
+        self.queue_layout()
+        self.queue_redraw()
 
         log("[PLUGIN] Plugins reloaded")
 
-    def _get_plugin_layout(self, total_w: int, total_h: int):
+    def _get_plugin_layout(self):
+        pad_x = self.settings["dock_padding_x"]
+        pad_y = self.settings["dock_padding_y"]
+
         visual = [p for p in self.plugins if p.enabled]
         if not visual:
-            return []
+            return [], pad_x * 2, self.settings["default_height"] + pad_y * 2
 
-        max_h = max(p.get_preferred_size()[1] for p in visual)
-        pad_y = self.settings["dock_padding_y"]
-        actual_h = max_h + pad_y * 2
+        sizes = [p.get_preferred_size() for p in visual]
+        actual_h = max(h for _w, h in sizes) + pad_y * 2
 
         layout = []
-        x = self.settings["dock_padding_x"]
-        for i, plugin in enumerate(visual):
-            w, h = plugin.get_preferred_size()
+        x = pad_x
+        for i, (plugin, (w, h)) in enumerate(zip(visual, sizes)):
             y = (actual_h - h) // 2
             layout.append((plugin, x, y, w, h))
             x += w
             if i < len(visual) - 1:
                 x += self.settings["dock_spacing"]
-        return layout
+        return layout, x + pad_x, actual_h
 
     def open_plugin_settings(self, plugin):
         plugin.show_settings_dialog()
@@ -255,16 +415,5 @@ class BrujoDock:
         cr.close_path()
 
     def save_settings(self):
-        import json
-        import os
-
-        config_dir = os.path.expanduser("~/.config/BrujoDock")
-        config_path = os.path.join(config_dir, "core.json")
-
-        os.makedirs(config_dir, exist_ok=True)
-
-        with open(config_path, "w") as f:
-            json.dump(self.settings, f, indent=2)
-
-        log(f"[SETTINGS] Saved: {config_path}")
+        save_core(self.settings)
 
@@ -0,0 +1,101 @@
+# core/event_router.py
+from bisect import bisect_right
+from gi.repository import Gdk, GLib
+
+
+class EventRouter:
+    def __init__(self, dock):
+        self.dock = dock
+        self._rects = []  # (plugin, x, y, w, h), sorted by x
+        self._starts = []  # x of each rect, for bisect
+        self._hovered = None
+        self._pending_motion = None  # latest (x, y); older positions are dropped
+        self._motion_id = None
+        self.stats = {
+            "motion_events": 0,
+            "motion_dispatched": 0,
+            "clicks": 0,
+            "rebuilds": 0,
+        }
+
+        area = dock.drawing_area
+        area.add_events(
+            Gdk.EventMask.BUTTON_PRESS_MASK |
+            Gdk.EventMask.POINTER_MOTION_MASK |
+            Gdk.EventMask.LEAVE_NOTIFY_MASK
+        )
+        area.connect("motion-notify-event", self._on_motion)
+        area.connect("leave-notify-event", self._on_leave)
+
+    def rebuild(self, layout):
+        self.stats["rebuilds"] += 1
+        self._rects = sorted((r for r in layout if r[3] > 0 and r[4] > 0), key=lambda r: r[1])
+        self._starts = [r[1] for r in self._rects]
+        if self._hovered is not None and self._hovered not in [r[0] for r in self._rects]:
+            self._hovered = None
+
+    def hit_test(self, x, y):
+        i = bisect_right(self._starts, x) - 1
+        if i < 0:
+            return None
+        plugin, px, py, w, h = self._rects[i]
+        if x < px + w and py <= y < py + h:
+            return plugin, x - px, y - py
+        return None
+
+    def dispatch_button_press(self, event):
+        self.stats["clicks"] += 1
+        hit = self.hit_test(event.x, event.y)
+        if hit is None:
+            return None, False
+        plugin, local_x, local_y = hit
+        return plugin, bool(plugin.on_button_press(local_x, local_y, event))
+
+    def reset(self):
+        if self._motion_id is not None:
+            GLib.source_remove(self._motion_id)
+            self._motion_id = None
+        self._pending_motion = None
+        self._hovered = None
+        self._rects = []
+        self._starts = []
+
+    def _on_motion(self, widget, event):
+        self.stats["motion_events"] += 1
+        self._pending_motion = (event.x, event.y)
+        if self._motion_id is None:
+            # Handled once per main-loop pass, with the newest position only
+            self._motion_id = GLib.idle_add(self._flush_motion, priority=GLib.PRIORITY_HIGH_IDLE)
+        return False
+
+    def _flush_motion(self):
+        self._motion_id = None
+        if self._pending_motion is None:
+            return False
+        x, y = self._pending_motion
+        self._pending_motion = None
+        self.stats["motion_dispatched"] += 1
+
+        hit = self.hit_test(x, y)
+        plugin = hit[0] if hit is not None else None
+        if plugin is not self._hovered and self._hovered is not None:
+            self._hovered.on_leave()
+        self._hovered = plugin
+        if hit is not None:
+            plugin.on_motion(hit[1], hit[2])
+        return False
+
+    def _on_leave(self, widget, event):
+        if self._motion_id is not None:
+            GLib.source_remove(self._motion_id)
+            self._motion_id = None
+        self._pending_motion = None
+        if self._hovered is not None:
+            self._hovered.on_leave()
+            self._hovered = None
+        return False
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["targets"] = len(self._rects)
+        return stats
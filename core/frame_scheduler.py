@@ -0,0 +1,92 @@
+# core/frame_scheduler.py
+from gi.repository import GLib
+
+
+class FrameScheduler:
+    def __init__(self, dock, max_fps=60):
+        self.dock = dock
+        self.max_fps = max_fps
+        self._layout_pending = False
+        self._redraw_all = False
+        self._redraw_plugins = set()
+        self._redraw_areas = {}  # plugin -> [(x, y, w, h)] in plugin coordinates
+        self._tick_id = None
+        self._delay_id = None
+        self._last_frame_us = 0
+        self.stats = {
+            "layouts_requested": 0,
+            "layouts_performed": 0,
+            "paints_requested": 0,
+            "paints_performed": 0,
+        }
+
+    def request_layout(self):
+        self.stats["layouts_requested"] += 1
+        self._layout_pending = True
+        self._schedule()
+
+    def request_redraw(self, plugin=None, area=None):
+        self.stats["paints_requested"] += 1
+        if plugin is None:
+            self._redraw_all = True
+        elif area is None:
+            self._redraw_plugins.add(plugin)
+        else:
+            self._redraw_areas.setdefault(plugin, []).append(area)
+        self._schedule()
+
+    def note_paint(self):
+        self.stats["paints_performed"] += 1
+
+    def cancel(self):
+        if self._tick_id is not None:
+            self.dock.drawing_area.remove_tick_callback(self._tick_id)
+            self._tick_id = None
+        if self._delay_id is not None:
+            GLib.source_remove(self._delay_id)
+            self._delay_id = None
+        self._layout_pending = False
+        self._redraw_all = False
+        self._redraw_plugins.clear()
+        self._redraw_areas.clear()
+
+    def _schedule(self):
+        if self._tick_id is not None or self._delay_id is not None:
+            return
+
+        min_interval_us = 1000000 // self.max_fps if self.max_fps > 0 else 0
+        elapsed_us = GLib.get_monotonic_time() - self._last_frame_us
+        if elapsed_us < min_interval_us:
+            delay_ms = max(1, (min_interval_us - elapsed_us) // 1000)
+            self._delay_id = GLib.timeout_add(delay_ms, self._on_delay)
+            return
+
+        self._tick_id = self.dock.drawing_area.add_tick_callback(self._on_tick)
+
+    def _on_delay(self):
+        self._delay_id = None
+        self._tick_id = self.dock.drawing_area.add_tick_callback(self._on_tick)
+        return GLib.SOURCE_REMOVE
+
+    def _on_tick(self, widget, frame_clock):
+        self._tick_id = None
+        self._last_frame_us = frame_clock.get_frame_time()
+
+        if self._layout_pending:
+            self._layout_pending = False
+            self.stats["layouts_performed"] += 1
+            self.dock.update_geometry()
+
+        if self._redraw_all:
+            self.dock.invalidate(None)
+        else:
+            for plugin in self._redraw_plugins:
+                self.dock.invalidate(plugin)
+            for plugin, areas in self._redraw_areas.items():
+                if plugin not in self._redraw_plugins:
+                    self.dock.invalidate(plugin, areas)
+        self._redraw_all = False
+        self._redraw_plugins.clear()
+        self._redraw_areas.clear()
+
+        return GLib.SOURCE_REMOVE
@@ -2,6 +2,7 @@ import os
 import json
 import locale
 from .utils import log
+from .startup_bundle import startup_bundle
 
 _translations = {}
 _current_lang = "en"
@@ -14,12 +15,12 @@ def init_i18n(lang=None, dock=None):
 
     _current_lang = lang
 
-    _translations = _load_core_translations(lang)
-
     if dock:
-        _translations.update(_load_plugin_translations(lang, dock))
+        _translations = startup_bundle.cached(f"translations/{lang}", lambda: _load_all_translations(lang))
+    else:
+        _translations = startup_bundle.cached(f"core_translations/{lang}", lambda: _load_core_translations(lang))
 
-    log(f"[I18N] Language: {lang}")
+    log("[I18N] Language: %s", lang)
 
 def _detect_language():
     try:
@@ -34,6 +35,15 @@ def _detect_language():
     return "en"
 
 
+# The loaders return (translations, source paths) for the startup bundle;
+# directories are listed so that added or removed locale files are noticed
+def _load_all_translations(lang):
+    translations, sources = _load_core_translations(lang)
+    plugin_translations, plugin_sources = _load_plugin_translations(lang)
+    translations.update(plugin_translations)
+    return translations, sources + plugin_sources
+
+
 def _load_core_translations(lang):
     locales_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "locales")
     lang_file = os.path.join(locales_dir, f"{lang}.json")
@@ -43,44 +53,47 @@ def _load_core_translations(lang):
 
     try:
         with open(lang_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+            return json.load(f), [locales_dir, lang_file]
     except Exception as e:
-        log(f"[I18N] Error loading core {lang_file}: {e}")
-        return {}
+        log("[I18N] Error loading core %s: %s", lang_file, e)
+        return {}, [locales_dir, lang_file]
 
 
-def _load_plugin_translations(lang, dock):
+def _load_plugin_translations(lang):
     translations = {}
 
     plugins_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "plugins")
+    sources = [plugins_dir]
 
     if not os.path.exists(plugins_dir):
-        log("Plugins folder not found", "WARNING")
-        return translations
+        log("Plugins folder not found", level="WARNING")
+        return translations, sources
 
-    log(f"Searching of the plugin translation: {lang}", "DEBUG")
+    log("Searching of the plugin translation: %s", lang, level="DEBUG")
 
     for plugin_name in os.listdir(plugins_dir):
         plugin_dir = os.path.join(plugins_dir, plugin_name)
         locales_dir = os.path.join(plugin_dir, "locales")
         lang_file = os.path.join(locales_dir, f"{lang}.json")
+        sources += [plugin_dir, locales_dir]
 
         if not os.path.exists(lang_file):
             lang_file = os.path.join(locales_dir, "en.json")
-            log(f"There is no {lang}.json for {plugin_name}, use en.json", "DEBUG")
+            log("There is no %s.json for %s, use en.json", lang, plugin_name, level="DEBUG")
 
         if os.path.exists(lang_file):
+            sources.append(lang_file)
             try:
                 with open(lang_file, "r", encoding="utf-8") as f:
                     plugin_translations = json.load(f)
                     translations.update(plugin_translations)
-                    log(f"Plugin translation was loaded: {plugin_name} ({lang})", "INFO")
+                    log("Plugin translation was loaded: %s (%s)", plugin_name, lang, level="INFO")
             except Exception as e:
-                log(f"Loading error {lang_file}: {e}", "ERROR")
+                log("Loading error %s: %s", lang_file, e, level="ERROR")
         else:
-            log(f"There arr no translations for plugin: {plugin_name}", "DEBUG")
+            log("There arr no translations for plugin: %s", plugin_name, level="DEBUG")
 
-    return translations
+    return translations, sources
 
 def _(text):
     return _translations.get(text, text)
@@ -95,13 +108,19 @@ def get_lang_name_eng():
     return _translations.get("_lang_name_eng", "English")
 
 def get_available_languages():
+    languages = startup_bundle.cached("languages", _scan_languages)
+    return [tuple(lang) for lang in languages]
+
+def _scan_languages():
     locales_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "locales")
     languages = []
+    sources = [locales_dir]
 
     if os.path.exists(locales_dir):
         for filename in os.listdir(locales_dir):
             if filename.endswith(".json"):
                 lang_code = filename.replace(".json", "")
+                sources.append(os.path.join(locales_dir, filename))
 
                 try:
                     with open(os.path.join(locales_dir, filename), "r", encoding="utf-8") as f:
@@ -112,7 +131,7 @@ def get_available_languages():
                 except:
                     languages.append((lang_code, lang_code, lang_code))
 
-    return sorted(languages, key=lambda x: x[1])
+    return sorted(languages, key=lambda x: x[1]), sources
 
 def set_language(lang, dock=None):
     init_i18n(lang, dock)
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
 import json
 from .settings import load_plugin, PLUGINS_DIR
+from .config_store import config_store
+from .startup_bundle import startup_bundle
 from .utils import log
 
 
@@ -24,15 +26,8 @@ class PluginBase:
         return self.description
 
     def get_plugin_xpos(self) -> int:
-        for i, plugin in enumerate(self.dock.plugins):
-            if plugin.name == self.name:
-                offset = self.dock.settings.get("dock_padding_x", 16)
-                for j in range(i):
-                    prev_plugin = self.dock.plugins[j]
-                    offset += prev_plugin.get_preferred_size()[0]
-                    offset += self.dock.settings.get("plugin_spacing", 8)
-                return offset
-        return 0
+        rect = self.dock._layer_rects.get(self)
+        return rect[0] if rect else 0
 
     def _load_settings(self):
         config_dir = os.path.expanduser("~/.config/BrujoDock/plugins")
@@ -40,28 +35,33 @@ class PluginBase:
 
         self.settings = dict(self.default_settings)
 
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, "r") as f:
-                    plugin_settings = json.load(f)
-                    self.settings.update(plugin_settings)
-                    log(f"[{self.name}] Loaded: {config_path}")
-            except Exception as e:
-                log(f"[{self.name}] Loading error: {e}")
+        plugin_settings = startup_bundle.cached(
+            f"plugin_config/{self.get_plugin_name()}", lambda: self._read_settings_file(config_path)
+        )
+        if plugin_settings is not None:
+            self.settings.update(plugin_settings)
         else:
-            log(f"[{self.name}] There is no config, creating: {config_path}", "INFO")
+            log("[%s] There is no config, creating: %s", self.name, config_path, level="INFO")
             self.save_settings()
 
+    def _read_settings_file(self, config_path):
+        if not os.path.exists(config_path):
+            return None, [config_path]
+        try:
+            with open(config_path, "r") as f:
+                plugin_settings = json.load(f)
+                log("[%s] Loaded: %s", self.name, config_path)
+                return plugin_settings, [config_path]
+        except Exception as e:
+            log("[%s] Loading error: %s", self.name, e)
+            return {}, [config_path]
+
     def save_settings(self):
         config_dir = os.path.expanduser("~/.config/BrujoDock/plugins")
         config_path = os.path.join(config_dir, f"{self.get_plugin_name()}.json")
 
-        os.makedirs(config_dir, exist_ok=True)
-
-        with open(config_path, "w") as f:
-            json.dump(self.settings, f, indent=2)
-
-        log(f"[{self.name}] Saved: {config_path}")
+        # Written shortly after on a background thread, together with any further changes
+        config_store.save(config_path, self.settings)
 
     def show_settings_dialog(self):
         from core.plugin_settings_dialog import PluginSettingsDialog
@@ -73,6 +73,31 @@ class PluginBase:
     def _open_settings(self):
         self.show_settings_dialog()
 
+    def queue_redraw(self, area=None):
+        self.dock.queue_redraw(self, area)
+
+    def queue_layout(self):
+        self.dock.queue_layout()
+
+    def add_timer(self, period_ms, callback, tolerance_ms=0, early_ms=None):
+        return self.dock.timers.subscribe(period_ms, callback, tolerance_ms, owner=self, early_ms=early_ms)
+
+    def unload(self):
+        self.dock.timers.release(self)
+
+    def get_diagnostics(self) -> dict:
+        return {}
+
+    # Input hooks, called by the dock's EventRouter with plugin-local coordinates
+    def on_motion(self, x, y):
+        pass
+
+    def on_leave(self):
+        pass
+
+    def on_button_press(self, x, y, event) -> bool:
+        return False
+
     def on_draw(self, cr, width, height):
         pass
 
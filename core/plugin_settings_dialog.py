@@ -178,7 +178,7 @@ class PluginSettingsDialog:
 
         self.plugin.dock.reload_plugins()
 
-        log(f"[{self.plugin.name}] Settings were applied")
+        log("[%s] Settings were applied", self.plugin.name)
 
     def run(self):
         self.dialog.show_all()
@@ -1,5 +1,6 @@
 import os
 import json
+from .config_store import config_store, write_json_atomic
 
 CONFIG_DIR = os.path.expanduser("~/.config/BrujoDock")
 PLUGINS_DIR = os.path.join(CONFIG_DIR, "plugins")
@@ -11,7 +12,9 @@ DEFAULT_CORE = {
     "dock_padding_y": 4,
     "corner_radius": 12,
     "dock_spacing": 4,
+    "max_fps": 60,
     "log_mode": "none",
+    "log_level": "INFO",
     "language": "en",
     "plugins": {
         "icon_panel": {"enabled": True},
@@ -28,8 +31,7 @@ def _ensure_config_dir():
 def ensure_core_config():
     _ensure_config_dir()
     if not os.path.exists(CORE_PATH):
-        with open(CORE_PATH, 'w') as f:
-            json.dump(DEFAULT_CORE, f, indent=2)
+        write_json_atomic(CORE_PATH, DEFAULT_CORE)
 
 def load_core(default_language="en"):
     DEFAULT_CORE["language"] = default_language
@@ -41,9 +43,7 @@ def load_core(default_language="en"):
         return result
 
 def save_core(data):
-    _ensure_config_dir()
-    with open(CORE_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
+    config_store.save(CORE_PATH, data)
 
 def load_plugin(plugin_name: str) -> dict:
     _ensure_config_dir()
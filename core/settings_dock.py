@@ -1,7 +1,7 @@
 import json
 import os
 from gi.repository import Gtk, Gdk
-from .utils import log
+from .utils import log, init_logger
 from core.i18n import _, get_available_languages
 from core.i18n import set_language
 
@@ -79,6 +79,7 @@ class SettingsDialog:
             (_("Dock Padding (Vertical):"), "dock_padding_y", 0, 64, 4),
             (_("Corner Radius:"), "corner_radius", 0, 32, 8),
             (_("Item Spacing:"), "dock_spacing", 0, 32, 2),
+            (_("Max FPS:"), "max_fps", 1, 240, 60),
         ]
 
         for label_text, key, min_val, max_val, default_val in settings_list:
@@ -188,7 +189,8 @@ class SettingsDialog:
         combo = Gtk.ComboBoxText()
         combo.append("none", _("None"))
         combo.append("console", _("Console"))
-        # combo.append("file", _("Файл")  # ← Задел на будущее
+        combo.append("file", _("File"))
+        combo.append("memory", _("Memory"))
 
         current_mode = self.settings.get("log_mode", "none")
         combo.set_active_id(current_mode)
@@ -204,7 +206,8 @@ class SettingsDialog:
             "<span color='#888888' size='small'>" +
             _("«None» — logging disabled") + "\n" +
             _("«Console» — output to terminal") + "\n" +
-            _("«File» — write to file (WIP)") +
+            _("«File» — write to ~/.config/BrujoDock/brujodock.log") + "\n" +
+            _("«Memory» — keep recent lines, saved on crash or from Diagnostics") +
             "</span>"
         )
         desc_label.set_halign(Gtk.Align.START)
@@ -307,7 +310,7 @@ class SettingsDialog:
                 if hasattr(plugin, 'show_settings_dialog'):
                     plugin.show_settings_dialog()
                 else:
-                    log(f"[{plugin_name}] There is no settings dialog")
+                    log("[%s] There is no settings dialog", plugin_name)
                 break
 
     def _on_plugin_toggled(self, switch, param, plugin_name):
@@ -315,7 +318,7 @@ class SettingsDialog:
         plugins_config = self.settings.get("plugins", {})
         if plugin_name in plugins_config:
             plugins_config[plugin_name]["enabled"] = switch.get_active()
-        log(f"[PLUGIN] {plugin_name}: {'enabled' if switch.get_active() else 'disabled'}")
+        log("[PLUGIN] %s: %s", plugin_name, 'enabled' if switch.get_active() else 'disabled')
 
     def _on_plugin_up(self, button):
         """Перемещает плагин вверх"""
@@ -456,16 +459,17 @@ class SettingsDialog:
 
         # ← 4. Сохраняем
         self.dock.save_settings()
+        init_logger(self.dock)
 
         # ← 5. Применяем язык
         set_language(self.settings.get("language", "en"), dock=self.dock)
 
         # ← 6. Обновляем док
-        self.dock.update_geometry()
-        self.dock.drawing_area.queue_draw()
+        self.dock.queue_layout()
+        self.dock.queue_redraw()
         self.dock.reload_plugins()
 
-        log(f"[SETTINGS] Applied: language={self.settings.get('language')}")
+        log("[SETTINGS] Applied: language=%s", self.settings.get('language'))
 
     def run(self):
         """Показывает диалог"""
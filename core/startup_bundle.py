@@ -0,0 +1,73 @@
+# core/startup_bundle.py
+import copy
+import json
+import os
+from .config_store import config_store
+from .utils import log
+
+BUNDLE_PATH = os.path.expanduser("~/.config/BrujoDock/startup_bundle.json")
+BUNDLE_VERSION = 1
+
+
+def _fingerprint(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class StartupBundle:
+    # Parsed results of the locale and config JSON files, stored in one file so a
+    # cold start does one read instead of dozens. The JSON files stay the source
+    # of truth: each section keeps the paths it was built from and is rebuilt as
+    # soon as one of them (or a directory listing) changes.
+    def __init__(self, path=BUNDLE_PATH):
+        self.path = path
+        self._sections = None  # name -> {"sources": {path: fingerprint}, "value": ...}
+        self.stats = {
+            "hits": 0,
+            "rebuilds": 0,
+        }
+
+    def cached(self, name, build):
+        # build() returns (value, source_paths)
+        if self._sections is None:
+            self._load()
+
+        section = self._sections.get(name)
+        if section is not None and all(
+            _fingerprint(path) == fingerprint for path, fingerprint in section["sources"].items()
+        ):
+            self.stats["hits"] += 1
+            return copy.deepcopy(section["value"])
+
+        self.stats["rebuilds"] += 1
+        value, sources = build()
+        self._sections[name] = {
+            "sources": {path: _fingerprint(path) for path in sources},
+            "value": value,
+        }
+        config_store.save(self.path, {"version": BUNDLE_VERSION, "sections": self._sections})
+        return copy.deepcopy(value)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["sections"] = len(self._sections or {})
+        return stats
+
+    def _load(self):
+        self._sections = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log("[BUNDLE] Ignoring %s: %s", self.path, e, level="WARNING")
+            return
+        if isinstance(data, dict) and data.get("version") == BUNDLE_VERSION:
+            self._sections = data.get("sections", {})
+
+
+startup_bundle = StartupBundle()
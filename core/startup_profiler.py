@@ -0,0 +1,241 @@
+# core/startup_profiler.py
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from .utils import log
+
+REPORT_VERSION = 1
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.entry = self.profiler._open(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._close(self.entry)
+        return False
+
+
+class _TimedLoader:
+    # Stands in for the real loader so module creation and execution can be timed;
+    # everything else (resource readers, get_source, ...) goes to the original
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+        self._entry = None
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    # One entry from create_module to the end of exec_module: extension modules
+    # (gi._gi, cairo) do their loading in create_module
+    def create_module(self, spec):
+        self._entry = self._profiler._begin_import(self._name)
+        create = getattr(self._loader, "create_module", None)
+        try:
+            return create(spec) if create is not None else None
+        except BaseException:
+            self._profiler._end_import(self._entry)
+            self._entry = None
+            raise
+
+    def exec_module(self, module):
+        entry = self._entry or self._profiler._begin_import(self._name)
+        self._entry = None
+        # The module keeps the real loader; isinstance() checks on it keep working
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._end_import(entry)
+
+
+class _ImportTimer:
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler, name)
+        return spec
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.report_path = None
+        self.exit_after_first_frame = True
+        self._t0 = 0.0
+        self._phases = []  # {"name", "start", "end", "depth"}
+        self._stack = []
+        self._marks = {}  # name -> seconds since start, first occurrence only
+        self._imports = []  # {"module", "start", "end", "depth", "children"}
+        self._import_stack = []
+        self._finder = None
+        self._reported = False
+
+    def start(self, report_path="-", exit_after_first_frame=True):
+        self.enabled = True
+        self.report_path = report_path
+        self.exit_after_first_frame = exit_after_first_frame
+        self._t0 = time.monotonic()
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+        atexit.register(self._on_exit)
+
+    def phase(self, name):
+        if not self.enabled:
+            return nullcontext()
+        return _Phase(self, name)
+
+    def mark(self, name):
+        if self.enabled and name not in self._marks:
+            self._marks[name] = time.monotonic() - self._t0
+
+    def watch_first_frame(self, window, widget):
+        # "after-paint" on the toplevel's frame clock follows the first draw of the
+        # dock contents; that is as close to "presented" as GTK3 tells us
+        if not self.enabled:
+            return
+        state = {}
+
+        def on_draw(_widget, _cr):
+            self.mark("first_draw")
+            widget.disconnect(state.pop("draw"))
+            clock = window.get_frame_clock()
+            if clock is None:
+                self._first_frame()
+                return False
+            state["clock"] = clock
+            state["paint"] = clock.connect("after-paint", on_after_paint)
+            return False
+
+        def on_after_paint(clock):
+            clock.disconnect(state.pop("paint"))
+            self._first_frame()
+
+        state["draw"] = widget.connect("draw", on_draw)
+
+    def get_report(self):
+        now = time.monotonic() - self._t0
+        plugins = {}
+        for phase in self._phases:
+            parts = phase["name"].split(":")
+            if len(parts) == 3 and parts[0] == "plugin":
+                plugins.setdefault(parts[1], {})[f"{parts[2]}_ms"] = _ms((phase["end"] or now) - phase["start"])
+
+        return {
+            "version": REPORT_VERSION,
+            "pid": os.getpid(),
+            "python": sys.version.split()[0],
+            "elapsed_ms": _ms(now),
+            "marks": {name: _ms(t) for name, t in sorted(self._marks.items(), key=lambda m: m[1])},
+            "phases": [
+                {
+                    "name": p["name"],
+                    "start_ms": _ms(p["start"]),
+                    "duration_ms": _ms((p["end"] if p["end"] is not None else now) - p["start"]),
+                    "depth": p["depth"],
+                }
+                for p in self._phases
+            ],
+            "plugins": plugins,
+            "imports": [
+                {
+                    "module": i["module"],
+                    "start_ms": _ms(i["start"]),
+                    "duration_ms": _ms(i["end"] - i["start"]),
+                    "self_ms": _ms(i["end"] - i["start"] - i["children"]),
+                    "depth": i["depth"],
+                }
+                for i in self._imports if i["end"] is not None
+            ],
+        }
+
+    def write_report(self):
+        text = json.dumps(self.get_report(), indent=2)
+        if self.report_path in (None, "-"):
+            print(text, flush=True)
+            return
+        try:
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            log("[PROFILE] Report written: %s", self.report_path, level="INFO")
+        except OSError as e:
+            log("[PROFILE] Cannot write %s: %s", self.report_path, e, level="ERROR")
+
+    def _open(self, name):
+        entry = {"name": name, "start": time.monotonic() - self._t0, "end": None, "depth": len(self._stack)}
+        self._phases.append(entry)
+        self._stack.append(entry)
+        return entry
+
+    def _close(self, entry):
+        entry["end"] = time.monotonic() - self._t0
+        if self._stack and self._stack[-1] is entry:
+            self._stack.pop()
+
+    def _begin_import(self, name):
+        entry = {
+            "module": name,
+            "start": time.monotonic() - self._t0,
+            "end": None,
+            "depth": len(self._import_stack),
+            "children": 0.0,
+        }
+        self._imports.append(entry)
+        self._import_stack.append(entry)
+        return entry
+
+    def _end_import(self, entry):
+        entry["end"] = time.monotonic() - self._t0
+        if self._import_stack and self._import_stack[-1] is entry:
+            self._import_stack.pop()
+        if self._import_stack:
+            self._import_stack[-1]["children"] += entry["end"] - entry["start"]
+
+    def _first_frame(self):
+        self.mark("first_frame")
+        if self._finder in sys.meta_path:
+            # Later imports are lazy work, not startup
+            sys.meta_path.remove(self._finder)
+        if not self.exit_after_first_frame:
+            return
+        self._report_once()
+        from gi.repository import Gtk
+        Gtk.main_quit()
+
+    def _report_once(self):
+        if not self._reported:
+            self._reported = True
+            self.write_report()
+
+    def _on_exit(self):
+        # --profile-keep-running: the report also covers marks reached after the first frame
+        self._report_once()
+
+
+profiler = StartupProfiler()
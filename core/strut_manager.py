@@ -13,8 +13,18 @@ except ImportError:
 class StrutManager:
     def __init__(self, dock):
         self.dock = dock
+        self._display = None
+        self._atoms = None  # (strut, strut_partial, cardinal)
+        self._xid = None
+        self._xlib_window = None
+        self._last_strut = None
+        self.stats = {
+            "writes": 0,
+            "skipped": 0,
+            "errors": 0,
+        }
 
-    def update(self, total_h = 48):
+    def update(self, x, y, width, height):
         if not HAS_XLIB:
             return
 
@@ -24,18 +34,59 @@ class StrutManager:
                 return
 
             xid = gdk_window.get_xid()
-            d = xdisplay.Display()
-            xlib_window = d.create_resource_object('window', xid)
+            d = self._get_display()
+            if xid != self._xid:
+                self._xid = xid
+                self._xlib_window = d.create_resource_object('window', xid)
+                self._last_strut = None
 
-            atom_strut = d.intern_atom("_NET_WM_STRUT")
-            atom_cardinal = d.get_atom("CARDINAL")
+            # Strut values are in device pixels, relative to the root window edges.
+            # Taken from GDK, which follows RandR changes; python-xlib's screen() info
+            # is filled once when the connection opens.
+            scale = gdk_window.get_scale_factor()
+            screen_h = gdk_window.get_screen().get_root_window().get_height() * scale
+            bottom = max(0, screen_h - y * scale)
+            start_x = x * scale
+            end_x = (x + width) * scale - 1
 
-            # Только высота дока — остальное 0
-#            alloc = self.dock.window.get_allocation()
-            strut = [0, 0, 0, total_h]  # left, right, top, bottom
+            # left, right, top, bottom, then start/end pairs for each edge
+            strut_partial = [0, 0, 0, bottom, 0, 0, 0, 0, 0, 0, start_x, end_x]
+            if strut_partial == self._last_strut:
+                self.stats["skipped"] += 1
+                return
 
-            xlib_window.change_property(atom_strut, atom_cardinal, 32, strut)
+            atom_strut, atom_strut_partial, atom_cardinal = self._atoms
+            self._xlib_window.change_property(atom_strut_partial, atom_cardinal, 32, strut_partial)
+            self._xlib_window.change_property(atom_strut, atom_cardinal, 32, strut_partial[:4])
             d.flush()
 
+            self._last_strut = strut_partial
+            self.stats["writes"] += 1
+
         except Exception as e:
-            log(f"[STRUT] Error: {e}")
\ No newline at end of file
+            self.stats["errors"] += 1
+            log("[STRUT] Error: %s", e)
+            self.close()
+
+    def _get_display(self):
+        if self._display is None:
+            d = xdisplay.Display()
+            self._atoms = (
+                d.intern_atom("_NET_WM_STRUT"),
+                d.intern_atom("_NET_WM_STRUT_PARTIAL"),
+                d.get_atom("CARDINAL"),
+            )
+            self._display = d
+        return self._display
+
+    def close(self):
+        if self._display is not None:
+            try:
+                self._display.close()
+            except Exception:
+                pass
+        self._display = None
+        self._atoms = None
+        self._xid = None
+        self._xlib_window = None
+        self._last_strut = None
@@ -0,0 +1,79 @@
+# core/text_service.py
+from collections import OrderedDict
+import gi
+gi.require_version('Pango', '1.0')
+gi.require_version('PangoCairo', '1.0')
+from gi.repository import Pango, PangoCairo
+
+
+class TextService:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._font_map = PangoCairo.FontMap.get_default()
+        self._context = self._font_map.create_context()
+        self._fonts = {}  # (face, size, absolute, bold) -> Pango.FontDescription
+        self._layouts = {}  # (face, size, absolute, bold) -> Pango.Layout
+        self._extents = OrderedDict()  # (text, face, size, absolute, bold) -> (w, h)
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "fonts": 0,
+            "layouts": 0,
+        }
+
+    def font(self, face, size, absolute=False, bold=False):
+        key = (face, int(size), absolute, bold)
+        font_desc = self._fonts.get(key)
+        if font_desc is None:
+            font_desc = Pango.FontDescription()
+            font_desc.set_family(face)
+            if bold:
+                font_desc.set_weight(Pango.Weight.BOLD)
+            if absolute:
+                font_desc.set_absolute_size(int(size) * Pango.SCALE)
+            else:
+                font_desc.set_size(int(size) * Pango.SCALE)
+            self._fonts[key] = font_desc
+            self.stats["fonts"] += 1
+        return font_desc
+
+    def layout(self, text, face, size, absolute=False, bold=False):
+        # The returned layout is shared: use it right away, do not keep it
+        key = (face, int(size), absolute, bold)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = Pango.Layout.new(self._context)
+            layout.set_font_description(self.font(face, size, absolute, bold))
+            self._layouts[key] = layout
+            self.stats["layouts"] += 1
+        layout.set_text(text, -1)
+        return layout
+
+    def measure(self, text, face, size, absolute=False, bold=False):
+        key = (text, face, int(size), absolute, bold)
+        extents = self._extents.get(key)
+        if extents is not None:
+            self._extents.move_to_end(key)
+            self.stats["hits"] += 1
+            return extents
+
+        self.stats["misses"] += 1
+        extents = self.layout(text, face, size, absolute, bold).get_pixel_size()
+        self._extents[key] = extents
+        if len(self._extents) > self.max_entries:
+            self._extents.popitem(last=False)
+        return extents
+
+    def show(self, cr, x, y, text, face, size, absolute=False, bold=False):
+        layout = self.layout(text, face, size, absolute, bold)
+        # The layouts live on a context of their own; pick up this surface's
+        # font options and transform before drawing
+        PangoCairo.update_layout(cr, layout)
+        cr.move_to(x, y)
+        PangoCairo.show_layout(cr, layout)
+        return layout
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["entries"] = len(self._extents)
+        return stats
@@ -0,0 +1,149 @@
+# core/timer_service.py
+from gi.repository import GLib
+from .utils import log
+
+# How early a periodic callback may run so it shares a wakeup with another timer
+BATCH_WINDOW_MS = 250
+
+
+def _now_ms():
+    return GLib.get_monotonic_time() // 1000
+
+
+class TimerHandle:
+    def __init__(self, service, callback, period_ms, tolerance_ms, early_ms, owner):
+        self.service = service
+        self.callback = callback
+        self.period_ms = period_ms
+        self.tolerance_ms = tolerance_ms
+        self.early_ms = early_ms
+        self.owner = owner
+        self.due_ms = _now_ms() + period_ms
+        self.active = True
+        self._deferred = False
+
+    def cancel(self):
+        self.service.cancel(self)
+
+    def defer(self, delay_ms):
+        self.service.defer(self, delay_ms)
+
+
+class TimerService:
+    def __init__(self):
+        self._handles = []
+        self._source_id = None
+        self._dispatching = False
+        self.stats = {
+            "wakeups": 0,
+            "callbacks": 0,
+            "early_callbacks": 0,
+            "aligned_wakeups": 0,
+        }
+
+    def subscribe(self, period_ms, callback, tolerance_ms=0, owner=None, early_ms=None):
+        # tolerance_ms: how late the callback may run; early_ms: how early it may run
+        # when another timer wakes the loop anyway (default: the tolerance, up to
+        # BATCH_WINDOW_MS). Boundary ticks such as the clock pass early_ms=0.
+        period_ms = max(1, int(period_ms))
+        # A tolerance of a whole period would let every wakeup slip past the next due time
+        tolerance_ms = min(max(0, int(tolerance_ms)), period_ms - 1)
+        if early_ms is None:
+            early_ms = min(tolerance_ms, BATCH_WINDOW_MS)
+        early_ms = min(max(0, int(early_ms)), period_ms - 1)
+        handle = TimerHandle(self, callback, period_ms, tolerance_ms, early_ms, owner)
+        self._handles.append(handle)
+        self._reschedule()
+        return handle
+
+    def cancel(self, handle):
+        if not handle.active:
+            return
+        handle.active = False
+        self._handles.remove(handle)
+        self._reschedule()
+
+    def release(self, owner):
+        for handle in [h for h in self._handles if h.owner is owner]:
+            handle.active = False
+            self._handles.remove(handle)
+        self._reschedule()
+
+    def defer(self, handle, delay_ms):
+        if not handle.active:
+            return
+        handle.due_ms = _now_ms() + max(0, int(delay_ms))
+        handle._deferred = True
+        self._reschedule()
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["active"] = len(self._handles)
+        return stats
+
+    def _reschedule(self):
+        if self._dispatching:
+            return
+
+        if self._source_id is not None:
+            GLib.source_remove(self._source_id)
+            self._source_id = None
+
+        if not self._handles:
+            return
+
+        now = _now_ms()
+        earliest_due = min(h.due_ms for h in self._handles)
+        latest_wake = min(h.due_ms + h.tolerance_ms for h in self._handles)
+
+        # GLib aligns second-granularity timeouts across the whole session and may
+        # fire them up to 250 ms early or 750 ms late, so only use them when every
+        # pending timer can absorb that
+        seconds = (latest_wake - now - 750) // 1000
+        if seconds >= 1 and now + seconds * 1000 - 250 >= earliest_due:
+            self._source_id = GLib.timeout_add_seconds(seconds, self._on_wakeup, True)
+        else:
+            self._source_id = GLib.timeout_add(max(0, latest_wake - now), self._on_wakeup, False)
+
+    def _on_wakeup(self, aligned):
+        self._source_id = None
+        self.stats["wakeups"] += 1
+        if aligned:
+            self.stats["aligned_wakeups"] += 1
+
+        now = _now_ms()
+        self._dispatching = True
+        try:
+            # Also timers that come due within their batching window, so the next one
+            # does not need a wakeup of its own a few milliseconds later
+            for handle in [h for h in self._handles if h.due_ms - h.early_ms <= now]:
+                if not handle.active:
+                    continue
+
+                handle._deferred = False
+                self.stats["callbacks"] += 1
+                if handle.due_ms > now:
+                    self.stats["early_callbacks"] += 1
+                try:
+                    keep = handle.callback()
+                except Exception as e:
+                    log("[TIMER] Callback error: %s", e, level="ERROR")
+                    keep = True
+
+                if not keep:
+                    if handle.active:
+                        handle.active = False
+                        self._handles.remove(handle)
+                elif not handle._deferred:
+                    late_ms = now - handle.due_ms
+                    if late_ms > handle.tolerance_ms + handle.period_ms:
+                        # A real stall (suspend, blocked main loop): start over from now
+                        handle.due_ms = now + handle.period_ms
+                    else:
+                        # Stay on the original schedule, skipping periods that already passed
+                        handle.due_ms += (max(0, late_ms) // handle.period_ms + 1) * handle.period_ms
+        finally:
+            self._dispatching = False
+
+        self._reschedule()
+        return GLib.SOURCE_REMOVE
@@ -1,29 +1,204 @@
+import atexit
+import os
+import queue
 import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
-_dock = None
+LOG_DIR = os.path.expanduser("~/.config/BrujoDock")
+LOG_PATH = os.path.join(LOG_DIR, "brujodock.log")
+DUMP_PATH = os.path.join(LOG_DIR, "brujodock-memory.log")
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+MEMORY_LINES = 2000
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Resolved once by configure_logger(); log() only compares an int and calls the sink
+_sink = None
+_min_level = LEVELS["INFO"]
+_writer = None
+_ring = None
+
+
+def _format(record):
+    created, level, message, args = record
+    if args:
+        try:
+            message = message % args
+        except (TypeError, ValueError):
+            message = f"{message} {args!r}"
+    timestamp = datetime.fromtimestamp(created).strftime("%H:%M:%S")
+    return f"[{timestamp}] [{level}] {message}"
+
+
+def _console_sink(record):
+    print(_format(record))
+
+
+def _memory_sink(record):
+    # Formatting is deferred until the buffer is dumped
+    _ring.append(record)
+
+
+def _ring_append(record):
+    global _ring
+    if _ring is None:
+        _ring = deque(maxlen=MEMORY_LINES)
+    _ring.append(record)
+
+
+def _file_sink(record):
+    _writer.put(record)
+
+
+class _FileWriter(threading.Thread):
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        super().__init__(name="log-writer", daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self.failed = False
+
+    def put(self, record):
+        self._queue.put(record)
+
+    def stop(self, timeout=1.0):
+        self._queue.put(None)
+        self.join(timeout)
+
+    def run(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            self._fail(e)
+            return
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            # Everything queued meanwhile goes out in the same write
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [r for r in batch if r is not None]
+            if batch and not self._write(batch):
+                return
+        self._file.close()
+
+    def _write(self, batch):
+        try:
+            self._file.write("".join(_format(r) + "\n" for r in batch))
+            self._file.flush()
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except (OSError, ValueError) as e:
+            for record in batch:
+                _ring_append(record)
+            self._fail(e)
+            return False
+        return True
+
+    def _fail(self, error):
+        # Nobody would read the queue any more: switch to the memory sink and keep
+        # what is still queued there, so nothing piles up and the lines can be dumped
+        global _sink, _ring
+        self.failed = True
+        print(f"[LOG] Cannot write {self.path}: {error}; keeping log lines in memory", file=sys.stderr)
+        if _ring is None:
+            _ring = deque(maxlen=MEMORY_LINES)
+        _sink = _memory_sink
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not None:
+                _ring_append(record)
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+
+def configure_logger(mode="none", level="INFO"):
+    global _sink, _min_level, _writer, _ring
+    if _writer is not None and (mode != "file" or _writer.failed):
+        _writer.stop()
+        _writer = None
+
+    _min_level = LEVELS.get(str(level).upper(), LEVELS["INFO"])
+    if mode == "console":
+        _sink = _console_sink
+    elif mode == "file":
+        if _writer is None:
+            _writer = _FileWriter(LOG_PATH)
+            _writer.start()
+        _sink = _file_sink
+    elif mode == "memory":
+        if _ring is None:
+            _ring = deque(maxlen=MEMORY_LINES)
+        _sink = _memory_sink
+    else:
+        _sink = None
+
 
 def init_logger(dock):
-    global _dock
-    _dock = dock
+    configure_logger(dock.settings.get("log_mode", "none"), dock.settings.get("log_level", "INFO"))
 
-def log(message, level="INFO"):
-    if _dock is None:
-        return
 
-    log_mode = _dock.settings.get("log_mode", "none")
+def log_enabled(level="INFO"):
+    return _sink is not None and LEVELS.get(level, 20) >= _min_level
+
 
-    if log_mode == "none":
+def log(message, *args, level="INFO"):
+    # Pass arguments separately (log("[X] %s", value)) so they are only
+    # formatted when the line is actually kept
+    if _sink is None or LEVELS.get(level, 20) < _min_level:
         return
+    _sink((time.time(), level, message, args))
+
+
+def dump_log_buffer(path=DUMP_PATH):
+    if not _ring:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for record in list(_ring):
+            f.write(_format(record) + "\n")
+    return path
+
+
+def _shutdown_logger():
+    if _writer is not None:
+        _writer.stop()
+
 
-    elif log_mode == "console":
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] [{level}] {message}")
+def _excepthook(exc_type, exc, tb):
+    import traceback
+    log("Unhandled exception:\n%s", "".join(traceback.format_exception(exc_type, exc, tb)), level="ERROR")
+    if _ring:
+        dump_log_buffer()
+    sys.__excepthook__(exc_type, exc, tb)
 
-    elif log_mode == "file":
-        # TODO: create logging to file
-        pass
 
-    elif log_mode == "memory":
-        # TODO: buffer in memory + writing many lines
-        pass
\ No newline at end of file
+atexit.register(_shutdown_logger)
+sys.excepthook = _excepthook
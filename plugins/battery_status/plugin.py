@@ -1,8 +1,11 @@
-import os
-import cairo
-from gi.repository import GLib
+import gi
+gi.require_version('PangoCairo', '1.0')
+from gi.repository import GLib, Pango, PangoCairo
 from core.plugin_base import PluginBase
+from core.utils import log
 from core.i18n import _
+from .power_supply import PowerSupplyReader, SYSFS_POWER_SUPPLY
+from .uevent import UeventMonitor
 
 class Plugin(PluginBase):
     name = "battery_status"
@@ -14,98 +17,124 @@ class Plugin(PluginBase):
         "font_face": "DejaVu Sans Mono Book",
         "font_size": 14,
         "padding_x": 8,
-        "update_interval_ms": 1000  # ms
+        "update_interval_ms": 1000,  # ms, polling when uevents are unavailable
+        "safety_poll_interval_ms": 60000  # ms, polling next to uevents
     }
 
+    # Swappable so the plugin can be driven by a fake uevent source and sysfs tree
+    uevent_source_factory = UeventMonitor
+    sysfs_root = SYSFS_POWER_SUPPLY
+
     def __init__(self, dock):
         super().__init__(dock)
         self._level_text = ""
         self._status_text = ""
         self._surface_width = 0
-        self._source_id = None
-        info = self._get_battery_info()
-        self._status_text, self._level_text = self._format_text(info)
+        self._uevent_idle_id = None
+        self._reader = PowerSupplyReader(self.sysfs_root)
+        self._info = self._reader.read()
+        self._status_text, self._level_text = self._format_text(self._info)
         self._recalculate_width()
-        self.dock.update_geometry()
-        interval = self.settings.get("update_interval_ms", 1000)
-        self._source_id = GLib.timeout_add(interval, self._update)
+        self.queue_layout()
+
+        self._uevents = self.uevent_source_factory(self._on_uevent)
+        if self._uevents.start():
+            interval = self.settings.get("safety_poll_interval_ms", 60000)
+        else:
+            interval = self.settings.get("update_interval_ms", 1000)
+        log("[BATTERY] Polling every %s ms", interval)
+        self.add_timer(interval, self._update, tolerance_ms=interval)
+
+    def unload(self):
+        super().unload()
+        self._uevents.close()
+        self._reader.close()
+        if self._uevent_idle_id is not None:
+            GLib.source_remove(self._uevent_idle_id)
+            self._uevent_idle_id = None
+
+    def get_diagnostics(self):
+        return dict(self._reader.stats)
+
+    def _on_uevent(self, props):
+        if props.get("ACTION") in ("add", "remove"):
+            self._reader.invalidate()
+        # A plug event fires several uevents back to back; refresh once for all of them
+        if self._uevent_idle_id is None:
+            self._uevent_idle_id = GLib.idle_add(self._on_uevent_idle)
 
-    def __del__(self):
-        if self._source_id:
-            GLib.source_remove(self._source_id)
+    def _on_uevent_idle(self):
+        self._uevent_idle_id = None
+        self._update()
+        return GLib.SOURCE_REMOVE
 
     def _update(self):
-        info = self._get_battery_info()
+        info = self._reader.read()
+        if info == self._info:
+            return GLib.SOURCE_CONTINUE
+        self._info = info
+
         _new_status, _new_level  = self._format_text(info)
-        if _new_level != self._level_text:
+        if _new_level != self._level_text or _new_status != self._status_text:
             self._level_text = _new_level
             self._status_text = _new_status
             self._recalculate_width()
-            self.dock.update_geometry()
-            self.dock.drawing_area.queue_draw()
+            self.queue_layout()
+        self.queue_redraw()
 
         return GLib.SOURCE_CONTINUE
 
+    def _measure(self, text):
+        # font_size is in pixels, as it was with the cairo toy font API
+        return self.dock.text_service.measure(text, self.settings["font_face"], self.settings["font_size"], absolute=True)
+
+    def _show_text(self, cr, text, x, y, baseline=False):
+        layout = self.dock.text_service.layout(text, self.settings["font_face"], self.settings["font_size"], absolute=True)
+        PangoCairo.update_layout(cr, layout)
+        if baseline:
+            y -= layout.get_baseline() / Pango.SCALE
+        cr.move_to(x, y)
+        PangoCairo.show_layout(cr, layout)
+
     def _recalculate_width(self):
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
-        cr = cairo.Context(surface)
-        cr.select_font_face(self.settings["font_face"], cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-        cr.set_font_size(self.settings["font_size"])
-        _, _, level_width, _, _, _ = cr.text_extents(self._level_text)
-        _, _, status_width, _, _, _ = cr.text_extents(self._status_text)
+        level_width = self._measure(self._level_text)[0]
+        status_width = self._measure(self._status_text)[0]
         self._surface_width = int(max(level_width, status_width)) + 2 * self.settings["padding_x"]
 
     def get_preferred_size(self):
         return (self._surface_width, self.settings["height"])
 
-    def _get_battery_info(self):
-        power_supply = "/sys/class/power_supply"
-        if not os.path.exists(power_supply):
-            return None
-        for item in os.listdir(power_supply):
-            if item.startswith("BAT"):
-                path = os.path.join(power_supply, item)
-                try:
-                    with open(os.path.join(path, "capacity"), "r") as f:
-                        cap = int(f.read().strip())
-                    with open(os.path.join(path, "status"), "r") as f:
-                        status = f.read().strip()
-                    return {"capacity": cap, "status": status}
-                except (OSError, ValueError, FileNotFoundError):
-                    continue
-        return None
-
     def _format_text(self, info):
         if info is None:
             return _("There is no battery"), "0"
 
-        return _("Charging") if info["status"].lower() == "charging" else _("Discharging") , f"{info['capacity']}%"
+        return _("Charging") if self._on_ac(info) else _("Discharging") , f"{info['capacity']}%"
 
-    def on_draw(self, cr, width, height):
-        info = self._get_battery_info()
+    def _on_ac(self, info):
+        # A full or "Not charging" battery on mains is not discharging
+        status = info["status"].lower()
+        return status == "charging" or (info["ac_online"] and status != "discharging")
 
-        cr.select_font_face(self.settings["font_face"], cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-        cr.set_font_size(self.settings["font_size"])
+    def on_draw(self, cr, width, height):
+        info = self._info
 
         if info is None:
             r, g, b = 0.7, 0.7, 0.7
             cr.set_source_rgb(r, g, b)
-            x_bearing, y_bearing, txt_width, txt_height = cr.text_extents(self._status_text)[:4]
+            txt_height = self._measure(self._status_text)[1]
             x = self.settings["padding_x"]
-            y = (height + txt_height) / 2
-            cr.move_to(x, y)
-            cr.show_text(self._status_text)
+            y = (height - txt_height) / 2
+            self._show_text(cr, self._status_text, x, y)
         else:
-            if info["status"].lower() == "charging":
+            if self._on_ac(info):
                 r, g, b = 0.29, 0.56, 0.88
             else:
                 r, g, b = 0.8, 0.8, 0.8
             cr.set_source_rgb(r, g, b)
-            x_bearing, y_bearing, txt_width, txt_height = cr.text_extents(self._status_text)[:4]
+            txt_width = self._measure(self._status_text)[0]
             x = (self._surface_width - txt_width) / 2
-            y = txt_height
-            cr.move_to(x, y)
-            cr.show_text(self._status_text)
+            y = 0
+            self._show_text(cr, self._status_text, x, y)
 
             if info["capacity"] >= 40:
                 r, g, b = 0.49, 0.83, 0.13
@@ -114,8 +143,7 @@ class Plugin(PluginBase):
             else:
                 r, g, b = 0.81, 0.01, 0.10
             cr.set_source_rgb(r, g, b)
-            x_bearing, y_bearing, txt_width, txt_height = cr.text_extents(self._level_text)[:4]
+            txt_width = self._measure(self._level_text)[0]
             x = (self._surface_width - txt_width) / 2
             y = 30
-            cr.move_to(x, y)
-            cr.show_text(self._level_text)
+            self._show_text(cr, self._level_text, x, y, baseline=True)
@@ -0,0 +1,142 @@
+# plugins/battery_status/power_supply.py
+
+import os
+from core.utils import log
+
+SYSFS_POWER_SUPPLY = "/sys/class/power_supply"
+
+_BATTERY_ATTRS = ("status", "capacity", "energy_now", "energy_full", "charge_now", "charge_full")
+_ADAPTER_TYPES = ("Mains", "USB", "USB_C", "USB_PD", "USB_PD_DRP")
+
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+class PowerSupplyReader:
+    def __init__(self, root=SYSFS_POWER_SUPPLY):
+        self.root = root
+        self._batteries = []  # [(name, {attr: fd})]
+        self._adapters = []  # [fd of "online"]
+        self._discovered = False
+        self.stats = {
+            "discoveries": 0,
+            "reads": 0,
+            "read_errors": 0,
+        }
+
+    def invalidate(self):
+        for _name, fds in self._batteries:
+            for fd in fds.values():
+                os.close(fd)
+        for fd in self._adapters:
+            os.close(fd)
+        self._batteries = []
+        self._adapters = []
+        self._discovered = False
+
+    def close(self):
+        self.invalidate()
+
+    def read(self):
+        if not self._discovered:
+            self.discover()
+        if not self._batteries:
+            return None
+
+        self.stats["reads"] += 1
+        try:
+            return self._aggregate()
+        except (OSError, ValueError) as e:
+            self.stats["read_errors"] += 1
+            log("[BATTERY] Read failed, rediscovering: %s", e, level="WARNING")
+
+        self.invalidate()
+        self.discover()
+        try:
+            return self._aggregate() if self._batteries else None
+        except (OSError, ValueError):
+            self.invalidate()
+            return None
+
+    def discover(self):
+        self.invalidate()
+        self.stats["discoveries"] += 1
+        self._discovered = True
+
+        if not os.path.isdir(self.root):
+            return
+
+        for item in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, item)
+            supply_type = _read_text(os.path.join(path, "type"))
+
+            if supply_type == "Battery":
+                # Mice, keyboards and headsets report scope=Device; they are not the system battery
+                if _read_text(os.path.join(path, "scope")) == "Device":
+                    continue
+                if _read_text(os.path.join(path, "present")) == "0":
+                    continue
+                fds = {}
+                for attr in _BATTERY_ATTRS:
+                    try:
+                        fds[attr] = os.open(os.path.join(path, attr), os.O_RDONLY | os.O_CLOEXEC)
+                    except OSError:
+                        pass
+                if "status" in fds and ("capacity" in fds or "energy_now" in fds or "charge_now" in fds):
+                    self._batteries.append((item, fds))
+                else:
+                    for fd in fds.values():
+                        os.close(fd)
+
+            elif supply_type in _ADAPTER_TYPES:
+                try:
+                    self._adapters.append(os.open(os.path.join(path, "online"), os.O_RDONLY | os.O_CLOEXEC))
+                except OSError:
+                    pass
+
+        log("[BATTERY] Batteries: %s, adapters: %d", [name for name, _fds in self._batteries], len(self._adapters), level="INFO")
+
+    def _aggregate(self):
+        statuses = []
+        levels = []  # (now, full) pairs in the best unit every battery supports
+        capacities = []
+
+        for _name, fds in self._batteries:
+            statuses.append(os.pread(fds["status"], 32, 0).strip().decode())
+            if "capacity" in fds:
+                capacities.append(int(os.pread(fds["capacity"], 16, 0)))
+            for now_attr, full_attr in (("energy_now", "energy_full"), ("charge_now", "charge_full")):
+                if now_attr in fds and full_attr in fds:
+                    levels.append((now_attr, int(os.pread(fds[now_attr], 24, 0)), int(os.pread(fds[full_attr], 24, 0))))
+                    break
+
+        units = {unit for unit, _now, _full in levels}
+        full_total = sum(full for _unit, _now, full in levels)
+        if len(levels) == len(self._batteries) and len(units) == 1 and full_total > 0:
+            # Weight by each pack's size so a small second battery does not skew the total
+            capacity = round(100 * sum(now for _unit, now, _full in levels) / full_total)
+        elif capacities:
+            capacity = round(sum(capacities) / len(capacities))
+        else:
+            raise ValueError("no usable capacity attribute")
+
+        ac_online = any(os.pread(fd, 4, 0).strip() == b"1" for fd in self._adapters)
+
+        if "Charging" in statuses:
+            status = "Charging"
+        elif "Discharging" in statuses:
+            status = "Discharging"
+        else:
+            status = statuses[0]
+
+        return {
+            "capacity": max(0, min(100, capacity)),
+            "status": status,
+            "ac_online": ac_online,
+            "batteries": len(self._batteries),
+        }
@@ -0,0 +1,71 @@
+# plugins/battery_status/uevent.py
+
+import socket
+from gi.repository import GLib
+from core.utils import log
+
+NETLINK_KOBJECT_UEVENT = 15
+# Multicast group of raw kernel uevents (udev re-broadcasts on group 2)
+_KERNEL_GROUP = 1
+
+
+def parse_uevent(data: bytes):
+    parts = data.split(b"\0")
+    header = parts[0].decode("utf-8", "replace")
+    if "@" not in header:
+        # libudev-formatted message, not a kernel one
+        return None
+    action, _sep, devpath = header.partition("@")
+    props = {"ACTION": action, "DEVPATH": devpath}
+    for part in parts[1:]:
+        key, sep, value = part.decode("utf-8", "replace").partition("=")
+        if sep:
+            props[key] = value
+    return props
+
+
+class UeventMonitor:
+    def __init__(self, callback, subsystem="power_supply"):
+        self.callback = callback
+        self.subsystem = subsystem
+        self._sock = None
+        self._watch_id = None
+
+    def start(self) -> bool:
+        try:
+            sock = socket.socket(
+                socket.AF_NETLINK,
+                socket.SOCK_DGRAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+                NETLINK_KOBJECT_UEVENT,
+            )
+            sock.bind((0, _KERNEL_GROUP))
+        except (OSError, AttributeError) as e:
+            log("[UEVENT] Netlink socket unavailable: %s", e, level="WARNING")
+            return False
+
+        self._sock = sock
+        self._watch_id = GLib.io_add_watch(sock.fileno(), GLib.PRIORITY_DEFAULT, GLib.IOCondition.IN, self._on_readable)
+        return True
+
+    def close(self):
+        if self._watch_id is not None:
+            GLib.source_remove(self._watch_id)
+            self._watch_id = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _on_readable(self, source, condition):
+        while True:
+            try:
+                data = self._sock.recv(16384)
+            except BlockingIOError:
+                return True
+            except OSError as e:
+                log("[UEVENT] Receive error: %s", e, level="ERROR")
+                self._watch_id = None
+                return False
+
+            props = parse_uevent(data)
+            if props is not None and props.get("SUBSYSTEM") == self.subsystem:
+                self.callback(props)
@@ -0,0 +1,155 @@
+# plugins/clock/glyphs.py
+
+import math
+import re
+import cairo
+import gi
+gi.require_version('PangoCairo', '1.0')
+from gi.repository import Pango, PangoCairo
+
+# Units a clock almost always needs, rendered up front
+_PREWARM = [*"0123456789:./-, ", "AM", "PM", "am", "pm"]
+# Digits and separators are drawn one per cell; anything else stays together as a run
+# so Pango keeps its kerning
+_UNITS = re.compile(r"[0-9 :./,\-]|[^0-9 :./,\-]+")
+# Date strings change daily; don't let old ones pile up
+MAX_GLYPHS = 256
+
+
+class Glyph:
+    __slots__ = ("surface", "advance", "offset_x", "fits")
+
+    def __init__(self, surface, advance, offset_x, fits):
+        self.surface = surface
+        self.advance = advance
+        self.offset_x = offset_x
+        self.fits = fits  # ink stays inside the advance, so the cell can be redrawn alone
+
+
+class GlyphCache:
+    def __init__(self, text_service):
+        self._text = text_service
+        self._key = None
+        self._glyphs = {}
+        self.height = 0
+        self.scale = 1
+        self.generation = 0
+
+    def configure(self, font_face, font_size, color, scale=1):
+        key = (font_face, int(font_size), tuple(color[:3]), scale)
+        if key == self._key:
+            return
+        self._key = key
+        self.scale = scale
+        self._glyphs.clear()
+        self.generation += 1
+
+        self.height = self._text.measure("".join(_PREWARM), font_face, font_size)[1]
+
+        for unit in _PREWARM:
+            self.glyph(unit)
+
+    def units(self, text):
+        if not text.isascii():
+            # Scripts that need shaping or bidi reordering are laid out as one string
+            return [text] if text else []
+        return _UNITS.findall(text)
+
+    def glyph(self, unit):
+        glyph = self._glyphs.get(unit)
+        if glyph is None:
+            if len(self._glyphs) >= MAX_GLYPHS:
+                self._glyphs = {u: g for u, g in self._glyphs.items() if u in _PREWARM}
+            glyph = self._render(unit)
+            self._glyphs[unit] = glyph
+        return glyph
+
+    def advances(self, units):
+        return [self.glyph(unit).advance for unit in units]
+
+    def text_width(self, text) -> int:
+        return math.ceil(sum(self.advances(self.units(text))))
+
+    def _render(self, unit):
+        font_face, font_size, color, scale = self._key
+        layout = self._text.layout(unit, font_face, font_size)
+        ink, logical = layout.get_extents()
+
+        advance = logical.width / Pango.SCALE
+        ink_right = (ink.x + ink.width) / Pango.SCALE
+        offset_x = math.ceil(max(0, -ink.x) / Pango.SCALE)
+        width = max(1, math.ceil(max(advance, ink_right)) + offset_x)
+        fits = ink.x >= 0 and ink_right <= advance
+
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width * scale, max(1, self.height) * scale)
+        surface.set_device_scale(scale, scale)
+        cr = cairo.Context(surface)
+        cr.set_source_rgb(*color)
+        cr.move_to(offset_x, 0)
+        PangoCairo.show_layout(cr, layout)
+        surface.flush()
+        return Glyph(surface, advance, offset_x, fits)
+
+
+class GlyphLine:
+    def __init__(self):
+        self.text = None
+        self.surface = None
+        self.width = 0
+        self._units = []
+        self._positions = []
+        self._generation = None
+
+    def update(self, cache, text):
+        units = cache.units(text)
+        positions = [0.0]
+        for advance in cache.advances(units):
+            positions.append(positions[-1] + advance)
+
+        if (self.surface is None or self._generation != cache.generation
+                or positions != self._positions):
+            self._redraw_all(cache, text, units, positions)
+            return
+
+        changed = [i for i, (old, new) in enumerate(zip(self._units, units)) if old != new]
+        if not all(cache.glyph(self._units[i]).fits and cache.glyph(units[i]).fits for i in changed):
+            # Ink reaching into a neighbouring cell would be cut by the cell clip
+            self._redraw_all(cache, text, units, positions)
+            return
+
+        # Same glyph geometry: only the cells whose unit changed are re-blitted
+        cr = cairo.Context(self.surface)
+        for i in changed:
+            self._draw_cell(cr, cache, units[i], positions[i], positions[i + 1])
+        self.text = text
+        self._units = units
+
+    def _redraw_all(self, cache, text, units, positions):
+        scale = cache.scale
+        glyphs = [cache.glyph(unit) for unit in units]
+        self.width = math.ceil(positions[-1])
+        # Overhanging ink past the last advance still gets room
+        right = max([self.width] + [positions[i] + g.surface.get_width() / scale - g.offset_x for i, g in enumerate(glyphs)])
+        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, max(1, math.ceil(right)) * scale, max(1, cache.height) * scale)
+        self.surface.set_device_scale(scale, scale)
+        cr = cairo.Context(self.surface)
+        for x, glyph in zip(positions, glyphs):
+            cr.set_source_surface(glyph.surface, round(x) - glyph.offset_x, 0)
+            cr.paint()
+        self.text = text
+        self._units = units
+        self._positions = positions
+        self._generation = cache.generation
+
+    def _draw_cell(self, cr, cache, unit, x0, x1):
+        glyph = cache.glyph(unit)
+        cr.save()
+        left, right = round(x0), round(x1)
+        cr.rectangle(left, 0, right - left, cache.height)
+        cr.clip()
+        cr.set_operator(cairo.OPERATOR_CLEAR)
+        cr.paint()
+        cr.set_operator(cairo.OPERATOR_OVER)
+        cr.set_source_surface(glyph.surface, left - glyph.offset_x, 0)
+        cr.paint()
+        cr.restore()
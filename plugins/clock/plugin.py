@@ -1,14 +1,14 @@
 # plugins/clock/plugin.py
 
 import datetime
-import cairo
 import gi
 gi.require_version('Gtk', '3.0')
-gi.require_version('PangoCairo', '1.0')
-from gi.repository import Gdk, Gtk, Pango, PangoCairo, GLib
+from gi.repository import Gtk, GLib
 from core.plugin_base import PluginBase
 from core.utils import log
 from core.i18n import _
+from .wallclock import MAX_SLEEP_MS, SECOND, ClockChangeMonitor, smallest_unit, ms_until_next
+from .glyphs import GlyphCache, GlyphLine
 
 
 class Plugin(PluginBase):
@@ -37,9 +37,36 @@ class Plugin(PluginBase):
         super().__init__(dock)
         self._text_width = 0
         self.clock_text = ["", ""]
-        self._setup_hover_handler()
+        self._glyphs = GlyphCache(dock.text_service)
+        self._lines = [GlyphLine(), GlyphLine()]
+        self._last_hovered = False
+        self._unit = smallest_unit(
+            self.settings.get("time_format", "%-I:%M:%S %P"),
+            self.settings.get("date_format", "%d.%m.%y"),
+        )
+        self.update_clock()
+        # Never before the boundary; a little after it lets other timers share the wakeup,
+        # and a whole second for minute or coarser formats allows session-aligned wakeups
+        tolerance_ms = 50 if self._unit == SECOND else 1000
+        period_ms = min(MAX_SLEEP_MS, self._unit * 1000)
+        self._timer = self.add_timer(period_ms, self._on_tick, tolerance_ms=tolerance_ms, early_ms=0)
+        self._timer.defer(ms_until_next(self._unit))
+        self._clock_monitor = ClockChangeMonitor(self._resync)
+
+    def unload(self):
+        super().unload()
+        self._clock_monitor.close()
+
+    def _on_tick(self):
+        if self._clock_monitor.check_drift():
+            log("[CLOCK] Resynchronizing after a clock jump")
+        self.update_clock()
+        self._timer.defer(ms_until_next(self._unit))
+        return True
+
+    def _resync(self):
         self.update_clock()
-        GLib.timeout_add(100, self.update_clock)
+        self._timer.defer(ms_until_next(self._unit))
 
     def update_clock(self):
         now = datetime.datetime.now()
@@ -52,27 +79,14 @@ class Plugin(PluginBase):
         if self.clock_text != [t, d]:
             self.clock_text = [t, d]
 
-            dummy_surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
-            dummy_cr = cairo.Context(dummy_surface)
-            layout = PangoCairo.create_layout(dummy_cr)
-            font_desc = Pango.FontDescription()
-            font_desc.set_family(self.settings["font_face"])
-            font_desc.set_size(int(self.settings["font_size"]) * Pango.SCALE)
-            layout.set_font_description(font_desc)
-
-            layout.set_text(t, -1)
-            w1 = layout.get_pixel_size()[0]
-            layout.set_text(d, -1)
-            w2 = layout.get_pixel_size()[0]
-
-            new_width = int(max(w1, w2) + 16)
+            self._configure_glyphs()
+            new_width = max(self._glyphs.text_width(t), self._glyphs.text_width(d)) + 16
 
             if new_width != self._text_width:
                 self._text_width = new_width
-                self.dock.update_geometry()
-                self.dock.drawing_area.queue_draw()
+                self.queue_layout()
 
-            self.dock.drawing_area.queue_draw()
+            self.queue_redraw()
 
         return True
 
@@ -87,6 +101,14 @@ class Plugin(PluginBase):
 
         return now.strftime(time_fmt)
 
+    def _configure_glyphs(self):
+        self._glyphs.configure(
+            self.settings.get("font_face", "DejaVu Sans Mono Book"),
+            self.settings.get("font_size", 8),
+            self.settings.get("text_color", [1.0, 1.0, 1.0]),
+            self.dock.window.get_scale_factor(),
+        )
+
     def _get_timezone_time(self, tz_name):
         try:
             import pytz
@@ -101,38 +123,17 @@ class Plugin(PluginBase):
             target_dt = local_dt.astimezone(tz)
             return target_dt
         except Exception as e:
-            log(f"[CLOCK] Timezone error {tz_name}: {e}")
+            log("[CLOCK] Timezone error %s: %s", tz_name, e)
             return datetime.datetime.now()
 
-    def _setup_hover_handler(self):
-        self.dock.drawing_area.connect("motion-notify-event", self._on_motion)
-        self.dock.drawing_area.connect("leave-notify-event", self._on_leave)
-        self.dock.drawing_area.add_events(
-            Gdk.EventMask.POINTER_MOTION_MASK | Gdk.EventMask.LEAVE_NOTIFY_MASK
-        )
-        self._last_hovered = False
-
-    def _on_motion(self, widget, event):
-        dock_width = self.dock.drawing_area.get_allocated_width()
-        dock_pad_x = self.dock.settings.get("dock_padding_x", 16)
-
-        clock_x = dock_width - self._text_width - dock_pad_x
-        clock_w = self._text_width
-
-        x_relative = event.x - dock_pad_x
+    def on_motion(self, x, y):
+        if not self._last_hovered:
+            self._last_hovered = True
+            self._show_timezone_tooltip(self.dock.drawing_area)
 
-        if clock_x <= x_relative <= clock_x + clock_w:
-            if not self._last_hovered:
-                self._last_hovered = True
-                self._show_timezone_tooltip(widget)
-        else:
-            if self._last_hovered:
-                self._last_hovered = False
-                widget.set_tooltip_text("")
-
-    def _on_leave(self, widget, event):
+    def on_leave(self):
         self._last_hovered = False
-        widget.set_tooltip_text("")
+        self.dock.drawing_area.set_tooltip_text("")
 
     def _get_local_timezone_name(self):
         try:
@@ -178,36 +179,21 @@ class Plugin(PluginBase):
         if not self.enabled:
             return
 
-        font_face = self.settings.get("font_face", "DejaVu Sans Mono Book")
-        font_size = self.settings.get("font_size", 8)
-        color = self.settings.get("text_color", [1.0, 1.0, 1.0])
-
-        cr.set_source_rgba(*color[:3], 1)
-
-        layout_time = PangoCairo.create_layout(cr)
-        font_desc = Pango.FontDescription()
-        font_desc.set_family(font_face)
-        font_desc.set_size(int(font_size) * Pango.SCALE)
-        layout_time.set_font_description(font_desc)
-        layout_time.set_text(self.clock_text[0], -1)
-
-        layout_date = PangoCairo.create_layout(cr)
-        layout_date.set_font_description(font_desc)
-        layout_date.set_text(self.clock_text[1], -1)
-
-        tw, th = layout_time.get_pixel_size()
-        dw, dh = layout_date.get_pixel_size()
+        self._configure_glyphs()
+        time_line, date_line = self._lines
+        time_line.update(self._glyphs, self.clock_text[0])
+        date_line.update(self._glyphs, self.clock_text[1])
 
-        x0 = width - tw - 8
-        x1 = width - dw - 8
+        x0 = width - time_line.width - 8
+        x1 = width - date_line.width - 8
         y0 = 0
-        y1 = 32 - dh
+        y1 = 32 - self._glyphs.height
 
-        cr.move_to(x0, y0)
-        PangoCairo.show_layout(cr, layout_time)
+        cr.set_source_surface(time_line.surface, x0, y0)
+        cr.paint()
 
-        cr.move_to(x1, y1)
-        PangoCairo.show_layout(cr, layout_date)
+        cr.set_source_surface(date_line.surface, x1, y1)
+        cr.paint()
 
 
     def get_preferred_size(self) -> tuple[int, int]:
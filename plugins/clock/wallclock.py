@@ -0,0 +1,176 @@
+# plugins/clock/wallclock.py
+
+import ctypes
+import datetime
+import errno
+import os
+import re
+import time
+from gi.repository import Gio, GLib
+from core.utils import log
+
+SECOND = 1
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+# strftime directive -> the smallest unit of time it shows
+_DIRECTIVE_UNITS = {
+    "S": SECOND, "s": SECOND, "T": SECOND, "X": SECOND, "r": SECOND, "c": SECOND, "f": SECOND,
+    "M": MINUTE, "R": MINUTE,
+    "H": HOUR, "I": HOUR, "k": HOUR, "l": HOUR, "p": HOUR, "P": HOUR, "z": HOUR, "Z": HOUR,
+}
+
+_DIRECTIVE_RE = re.compile(r"%[-_0^#]?[EO]?(.)")
+
+# Longest sleep between ticks, so a missed clock change is noticed within a minute
+MAX_SLEEP_MS = 60000
+
+# Wake slightly after the boundary so the new value is already visible
+_BOUNDARY_SLACK_MS = 2
+
+
+def smallest_unit(*formats) -> int:
+    unit = DAY
+    for fmt in formats:
+        for directive in _DIRECTIVE_RE.findall(fmt or ""):
+            if directive == "%":
+                continue
+            unit = min(unit, _DIRECTIVE_UNITS.get(directive, DAY))
+    return unit
+
+
+def ms_until_next(unit: int) -> int:
+    if unit <= MINUTE:
+        # Every UTC offset is a whole number of minutes, so epoch arithmetic is exact
+        now = time.time()
+        delay = unit - (now % unit)
+    else:
+        now = datetime.datetime.now().astimezone()
+        if unit == HOUR:
+            boundary = now.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+        else:
+            boundary = now.replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+        delay = (boundary - now).total_seconds()
+
+    return min(MAX_SLEEP_MS, int(delay * 1000) + _BOUNDARY_SLACK_MS)
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+
+_CLOCK_REALTIME = 0
+_TFD_NONBLOCK = os.O_NONBLOCK
+_TFD_CLOEXEC = os.O_CLOEXEC
+_TFD_TIMER_ABSTIME = 1
+_TFD_TIMER_CANCEL_ON_SET = 2
+
+
+class ClockChangeMonitor:
+    def __init__(self, callback):
+        self.callback = callback
+        self._timer_fd = None
+        self._watch_id = None
+        self._bus = None
+        self._signal_id = None
+        self._cancellable = Gio.Cancellable()
+        self._last_real = time.time()
+        self._last_mono = time.monotonic()
+
+        self._open_timerfd()
+        Gio.bus_get(Gio.BusType.SYSTEM, self._cancellable, self._on_bus_ready)
+
+    def check_drift(self) -> bool:
+        real, mono = time.time(), time.monotonic()
+        drift = (real - self._last_real) - (mono - self._last_mono)
+        self._last_real, self._last_mono = real, mono
+        if abs(drift) > 1.0:
+            log("[CLOCK] Wall clock drifted by %.1fs", drift)
+            return True
+        return False
+
+    def close(self):
+        self._cancellable.cancel()
+        if self._watch_id is not None:
+            GLib.source_remove(self._watch_id)
+            self._watch_id = None
+        if self._timer_fd is not None:
+            os.close(self._timer_fd)
+            self._timer_fd = None
+        if self._signal_id is not None:
+            self._bus.signal_unsubscribe(self._signal_id)
+            self._signal_id = None
+
+    def _notify(self):
+        self._last_real, self._last_mono = time.time(), time.monotonic()
+        self.callback()
+
+    def _open_timerfd(self):
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.timerfd_create(_CLOCK_REALTIME, _TFD_NONBLOCK | _TFD_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "timerfd_create failed")
+            self._timer_fd = fd
+            self._timerfd_settime = libc.timerfd_settime
+            self._arm_timerfd()
+            self._watch_id = GLib.io_add_watch(fd, GLib.PRIORITY_DEFAULT, GLib.IOCondition.IN, self._on_timerfd)
+        except Exception as e:
+            log("[CLOCK] Clock change notifications unavailable: %s", e)
+            if self._timer_fd is not None:
+                os.close(self._timer_fd)
+                self._timer_fd = None
+
+    def _arm_timerfd(self):
+        # A far-future absolute timer that never expires; it exists only to be
+        # cancelled by the kernel when someone sets CLOCK_REALTIME
+        spec = _Itimerspec()
+        spec.it_value.tv_sec = 2 ** 31 - 1
+        flags = _TFD_TIMER_ABSTIME | _TFD_TIMER_CANCEL_ON_SET
+        if self._timerfd_settime(self._timer_fd, flags, ctypes.byref(spec), None) < 0:
+            raise OSError(ctypes.get_errno(), "timerfd_settime failed")
+
+    def _on_timerfd(self, source, condition):
+        try:
+            os.read(self._timer_fd, 8)
+        except BlockingIOError:
+            return True
+        except OSError as e:
+            if e.errno != errno.ECANCELED:
+                log("[CLOCK] timerfd error: %s", e)
+                self._watch_id = None
+                return False
+            log("[CLOCK] Wall clock was set")
+            self._arm_timerfd()
+            self._notify()
+        return True
+
+    def _on_bus_ready(self, source, result):
+        try:
+            self._bus = Gio.bus_get_finish(result)
+        except Exception as e:
+            if self._cancellable.is_cancelled():
+                return
+            log("[CLOCK] System bus unavailable: %s", e)
+            return
+
+        self._signal_id = self._bus.signal_subscribe(
+            "org.freedesktop.login1",
+            "org.freedesktop.login1.Manager",
+            "PrepareForSleep",
+            "/org/freedesktop/login1",
+            None,
+            Gio.DBusSignalFlags.NONE,
+            self._on_prepare_for_sleep,
+        )
+
+    def _on_prepare_for_sleep(self, connection, sender, path, interface, signal, params):
+        going_to_sleep = params.unpack()[0]
+        if not going_to_sleep:
+            log("[CLOCK] Resumed from suspend")
+            self._notify()
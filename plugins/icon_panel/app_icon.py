@@ -1,10 +1,9 @@
 # plugins/icon_panel/app_icon.py
 
 import os
-from gi.repository import Gio, GLib
+from .desktop_index import parse_desktop_file
 from .special_classes import normalize_identifier
 from core.utils import log
-import cairo
 
 
 class AppIcon:
@@ -14,61 +13,58 @@ class AppIcon:
         self.gicon = None
         self.desktop_path = desktop_path
         self.pinned = pinned
-        self.running_windows = []
+        self._windows = {}  # xid -> Wnck.Window, in opening order
         self.hovered = False
         self.active = False
         self.icon_surface = None
+        self._surface_key = None  # (size, scale) the icon was last resolved for
+        self._surface_size = None  # (size, scale) of icon_surface
+        self.icon_path = None
+        self.icon_missing = False
         self.identifier = identifier
         self.app = app
 
     @classmethod
-    def from_desktop_file(cls, path, pinned=False):
-        if not os.path.exists(path):
+    def from_desktop_file(cls, path, pinned=False, desktop_index=None):
+        if desktop_index is not None:
+            entry = desktop_index.get(path)
+        else:
+            entry = parse_desktop_file(path) if os.path.exists(path) else None
+        if entry is None:
+            log("[ICON] Ошибка .desktop %s", path)
             return None
-        try:
-            keyfile = GLib.KeyFile()
-            keyfile.load_from_file(path, GLib.KeyFileFlags.NONE)
 
-            name = keyfile.get_string("Desktop Entry", "Name") or os.path.basename(path).replace(".desktop", "")
-            icon_name = keyfile.get_string("Desktop Entry", "Icon") or "application-x-executable"
+        basename = os.path.basename(path).replace(".desktop", "")
+        name = entry["name"] or basename
+        icon_name = entry["icon"] or "application-x-executable"
+        identifier = normalize_identifier(entry["wm_class"] or basename)
 
-            identifier = ""
-            try:
-                identifier = keyfile.get_string("Desktop Entry", "StartupWMClass")
-            except:
-                pass
+        return cls(
+            name=name,
+            icon_name=icon_name,
+            desktop_path=path,
+            identifier=identifier,
+            pinned=pinned
+        )
 
-            if not identifier:
-                identifier = os.path.basename(path).replace(".desktop", "")
+    @property
+    def running_windows(self):
+        return list(self._windows.values())
 
-            # Нормализуем
-            from .special_classes import normalize_identifier
-            identifier = normalize_identifier(identifier)
-
-            return cls(
-                name=name,
-                icon_name=icon_name,
-                desktop_path=path,
-                identifier=identifier,  # ← убедись, что это есть
-                pinned=pinned
-            )
-        except Exception as e:
-            log(f"[ICON] Ошибка .desktop {path}: {e}")
-            return None
+    def window_count(self) -> int:
+        return len(self._windows)
 
     def is_running(self) -> bool:
-        return len(self.running_windows) > 0
+        return len(self._windows) > 0
 
     def add_window(self, win):
-        if win not in self.running_windows:
-            self.running_windows.append(win)
+        self._windows.setdefault(win.get_xid(), win)
 
     def has_window(self, win) -> bool:
-        return win in self.running_windows
+        return win.get_xid() in self._windows
 
     def remove_window(self, win):
-        if win in self.running_windows:
-            self.running_windows.remove(win)
+        self._windows.pop(win.get_xid(), None)
 
     def set_hovered(self, hovered: bool):
         self.hovered = hovered
@@ -86,68 +82,89 @@ class AppIcon:
         return self.icon_surface
 
 
-    def load_icon_surface(self, size=32):
-        if self.icon_surface is not None:
+    def icon_candidates(self):
+        from .special_classes import get_icon_name_for_identifier
+
+        candidates = [
+            self.icon_name,
+            get_icon_name_for_identifier(self.identifier),
+            self.identifier.split("-")[0],
+            self.identifier,
+        ]
+        return list(dict.fromkeys([c for c in candidates if c and " " not in c]))
+
+    def needs_icon(self, size, scale) -> bool:
+        return self._surface_key != (size, scale)
+
+    # Called from the panel's idle resolver, never from on_draw
+    def load_icon_surface(self, store, lookup, size=32, scale=1, on_ready=None):
+        key = (size, scale)
+        if self._surface_key == key:
             return
+        self._surface_key = key
 
-        # Fallback — серый квадрат
-        fallback = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
-        cr_fallback = cairo.Context(fallback)
-        cr_fallback.set_source_rgb(0.8, 0.8, 0.8)
-        cr_fallback.rectangle(4, 4, size - 8, size - 8)
-        cr_fallback.fill()
-        self.icon_surface = fallback
+        # Пока иконка грузится в фоне, панель рисует серый квадрат.
+        # При повторном поиске (новые иконки, смена темы) старая иконка остаётся до замены.
+        if self._surface_size != key:
+            self.icon_surface = None
 
         try:
-            from gi.repository import Gtk, Gdk, GdkPixbuf
-            icon_theme = Gtk.IconTheme.get_default()
-
-            if self.app:
-                try:
-                    gicon = self.app.get_icon()
-                    if gicon:
-                        if hasattr(gicon, 'get_filename'):
-                            self.icon_surface = Gdk.cairo_surface_create_from_pixbuf(gicon, 0, None)
-                            return
-                        else:
-                            icon_info = icon_theme.lookup_by_gicon(gicon, size, Gtk.IconLookupFlags.FORCE_SIZE)
-                            if icon_info:
-                                pixbuf = icon_info.load_icon()
-                                self.icon_surface = Gdk.cairo_surface_create_from_pixbuf(pixbuf, 0, None)
-                                return
-                except Exception:
-                    pass
-
-            if self.icon_name and self.icon_name.startswith("/"):
-                if os.path.exists(self.icon_name):
-                    pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(self.icon_name, size, size)
-                    self.icon_surface = Gdk.cairo_surface_create_from_pixbuf(pixbuf, 0, None)
-                    return
-
-            from .special_classes import get_icon_name_for_identifier
-
-            icon_candidates = [
-                self.icon_name,
-                get_icon_name_for_identifier(self.identifier),
-                self.identifier.split("-")[0],
-                self.identifier,
-            ]
-
-            icon_candidates = list(dict.fromkeys([c for c in icon_candidates if c and " " not in c]))
-
-            for icon_name in icon_candidates:
-                try:
-                    pixbuf = icon_theme.load_icon(icon_name, size, Gtk.IconLookupFlags.FORCE_SIZE)
-                    self.icon_surface = Gdk.cairo_surface_create_from_pixbuf(pixbuf, 0, None)
-                    return
-                except Exception:
-                    continue
-
+            source = self._resolve_source(lookup, size, scale)
         except Exception as e:
-            log(f"[ICON] Ошибка загрузки: {e}")
+            log("[ICON] Ошибка загрузки: %s", e)
+            source = None
+
+        self.icon_path = source if isinstance(source, str) else None
+        self.icon_missing = source is None
+        if isinstance(source, str):
+            surface = store.load_file(source, size, scale, lambda s: self._on_surface_loaded(key, s, on_ready))
+            if surface is not None:
+                self.icon_surface = surface
+                self._surface_size = key
+        elif source is not None:
+            self.icon_surface = source
+            self._surface_size = key
+
+    def invalidate_icon(self):
+        # Resolve again the next time the panel queues this icon
+        self._surface_key = None
+
+    def _on_surface_loaded(self, key, surface, on_ready):
+        # Size or scale may have changed while the icon was decoding
+        if key != self._surface_key:
+            return
+        if surface is None:
+            self.icon_missing = True
+            return
+        self.icon_surface = surface
+        self._surface_size = key
+        if on_ready:
+            on_ready(self)
 
-    def _draw_badge(self, cr, x, y, settings):
-        count = len(self.running_windows)
+    def _resolve_source(self, lookup, size, scale):
+        if self.app:
+            try:
+                source = lookup.resolve_gicon(self.app.get_icon(), size, scale)
+                if source is not None:
+                    return source
+            except Exception:
+                pass
+
+        if self.icon_name and self.icon_name.startswith("/"):
+            if os.path.exists(self.icon_name):
+                return self.icon_name
+
+        for icon_name in self.icon_candidates():
+            try:
+                source = lookup.resolve_name(icon_name, size, scale)
+            except Exception:
+                continue
+            if source is not None:
+                return source
+        return None
+
+    def _draw_badge(self, cr, x, y, settings, text_service):
+        count = len(self._windows)
         icon_size = settings["icon_size"]
         pad_x = settings["icon_padding_x"]
 
@@ -159,10 +176,6 @@ class AppIcon:
         cr.fill()
 
         cr.set_source_rgb(1, 1, 1)
-        cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
-        cr.set_font_size(8)
-
         text = str(count) if count < 10 else "9+"
-        _, _, w, h = cr.text_extents(text)[:4]
-        cr.move_to(badge_x + 6 - w / 2, badge_y + 6 + h / 2)
-        cr.show_text(text)
+        w, h = text_service.measure(text, "Sans", 8, absolute=True, bold=True)
+        text_service.show(cr, badge_x + 6 - w / 2, badge_y + 6 - h / 2, text, "Sans", 8, absolute=True, bold=True)
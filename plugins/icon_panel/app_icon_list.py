@@ -1,73 +1,66 @@
 from .app_icon import AppIcon
-from .special_classes import normalize_identifier, get_chromium_identifier, get_libreoffice_identifier
 from  core.utils import log
 
 
 class AppIconList:
-    def __init__(self, pinned_paths):
+    def __init__(self, pinned_paths, desktop_index=None):
         self.icons = []
         self.pinned_paths = pinned_paths
+        self._by_identifier = {}  # identifier -> AppIcon
+        self._by_xid = {}  # window xid -> AppIcon
         # Предзагружаем закреплённые иконки
         for path in pinned_paths:
-            icon = AppIcon.from_desktop_file(path, pinned=True)
+            icon = AppIcon.from_desktop_file(path, pinned=True, desktop_index=desktop_index)
             if icon:
-                log(f"[PINNED] {icon.name} | identifier='{icon.identifier}'")
-                self.icons.append(icon)
+                log("[PINNED] %s | identifier='%s'", icon.name, icon.identifier, level="INFO")
+                self._add_icon(icon)
 
-    def add_window(self, wm_class, app, window):
-        if "libreoffice" in wm_class.lower() or "soffice" in wm_class.lower():
-            identifier = get_libreoffice_identifier(window)
-        else:
-            identifier = normalize_identifier(wm_class)
+    def _add_icon(self, icon):
+        self.icons.append(icon)
+        if icon.identifier:
+            self._by_identifier.setdefault(icon.identifier, icon)
 
-        for icon in self.icons:
-            if icon.identifier == identifier:
-                icon.add_window(window)
-                return
+    def remove_icon(self, icon):
+        self.icons.remove(icon)
+        if self._by_identifier.get(icon.identifier) is icon:
+            del self._by_identifier[icon.identifier]
+            # Another icon may share the identifier (e.g. pinned twice)
+            for other in self.icons:
+                if other.identifier == icon.identifier:
+                    self._by_identifier[icon.identifier] = other
+                    break
+        for window in icon.running_windows:
+            self._by_xid.pop(window.get_xid(), None)
 
-        new_icon = AppIcon(
-            name=window.get_name() or identifier,
-            icon_name=identifier,
-            identifier=identifier,
-            app=app,
-            pinned=False
-        )
-        new_icon.add_window(window)
-        self.icons.append(new_icon)
+    def icon_for_window(self, window):
+        return self._by_xid.get(window.get_xid())
 
-    def remove_window(self, window_ref):
-        for icon in self.icons[:]:
-            if icon.has_window(window_ref):
-                icon.remove_window(window_ref)
-                if not icon.is_running() and not icon.pinned:
-                    self.icons.remove(icon)
-                break
-
-    def _find_icon_by_wm_class(self, wm_class_norm: str):
-        if not wm_class_norm:
-            return None
+    def icon_for_identifier(self, identifier):
+        return self._by_identifier.get(identifier)
 
-        # Сначала ищем по wm_class
-        for icon in self.icons:
-            if icon and icon.wm_class:
-                if icon.wm_class.strip().lower() == wm_class_norm:
-                    return icon
+    def add_window(self, identifier, app, window):
+        xid = window.get_xid()
+        if xid in self._by_xid:
+            return
 
-        # Fallback: ищем по имени (нормализованному)
-        name_norm = wm_class_norm
-        for icon in self.icons:
-            if icon and icon.name:
-                if icon.name.strip().lower() == name_norm:
-                    return icon
+        icon = self._by_identifier.get(identifier)
+        if icon is None:
+            icon = AppIcon(
+                name=window.get_name() or identifier,
+                icon_name=identifier,
+                identifier=identifier,
+                app=app,
+                pinned=False
+            )
+            self._add_icon(icon)
 
-        return None
+        icon.add_window(window)
+        self._by_xid[xid] = icon
 
-    def _create_icon_from_wm_class(self, wm_class: str):
-        # Пока просто создаём анонимную иконку
-        return AppIcon(name=wm_class or "Unknown", pinned=False)
-
-    def _find_icon_by_desktop_file(self, desktop_file):
-        for icon in self.icons:
-            if icon and icon.desktop_file == desktop_file:
-                return icon
-        return None
\ No newline at end of file
+    def remove_window(self, window_ref):
+        icon = self._by_xid.pop(window_ref.get_xid(), None)
+        if icon is None:
+            return
+        icon.remove_window(window_ref)
+        if not icon.is_running() and not icon.pinned:
+            self.remove_icon(icon)
@@ -0,0 +1,262 @@
+# plugins/icon_panel/classifier.py
+
+import hashlib
+import json
+import os
+import re
+from .special_classes import SPECIAL_RES_CLASSES, normalize_identifier
+from core.utils import log
+
+RULES_PATH = os.path.expanduser("~/.config/BrujoDock/window_rules.json")
+
+_LIBREOFFICE_CLASSES = [
+    "libreoffice", "soffice", "libreoffice-startcenter", "libreoffice-writer", "libreoffice-calc",
+    "libreoffice-impress", "libreoffice-draw", "libreoffice-base", "libreoffice-math",
+]
+_CHROMIUM_CLASSES = ["chromium", "chromium-browser", "google-chrome", "vivaldi-stable", "brave-browser"]
+
+# Checked after the user's rules, in this order. The first matching rule wins;
+# a window no rule claims is identified by its normalized res_class.
+BUILTIN_RULES = [
+    *[{"res_class": _LIBREOFFICE_CLASSES, "res_name": module, "identifier": f"libreoffice-{module}"}
+      for module in ("calc", "base", "impress", "draw", "math", "writer")],
+    *[{"res_class": _LIBREOFFICE_CLASSES, "title": module, "identifier": f"libreoffice-{module}"}
+      for module in ("calc", "base", "impress", "draw", "math")],
+    {"res_class": _LIBREOFFICE_CLASSES, "identifier": "libreoffice-writer"},
+    # Site-specific browser windows (PWAs) get their own icon, stable across restarts
+    {"res_class": _CHROMIUM_CLASSES, "cmdline": "--app=\"?(?P<app>[^\\s\"]+)", "identifier": "{res_class}-{digest}"},
+    *[{"res_class": res_class, "identifier": identifier} for res_class, identifier in SPECIAL_RES_CLASSES.items()],
+    {"desktop_hint": True, "identifier": "{desktop_id}"},
+]
+
+_REGEX_FIELDS = ("res_name", "title", "cmdline", "cgroup")
+
+
+def stable_digest(*parts) -> str:
+    # hash() is salted per process; identifiers end up in pinned settings and must survive restarts
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()[:8]
+
+
+class _Rule:
+    def __init__(self, spec, index):
+        self.index = index
+        self.identifier = spec["identifier"]
+        res_class = spec.get("res_class")
+        if isinstance(res_class, str):
+            res_class = [res_class]
+        self.res_classes = [c.lower() for c in res_class] if res_class else None
+        self.regexes = {
+            field: re.compile(spec[field], re.IGNORECASE)
+            for field in _REGEX_FIELDS if spec.get(field)
+        }
+        self.env = {name: re.compile(pattern) for name, pattern in spec.get("env", {}).items()}
+        self.desktop_hint = bool(spec.get("desktop_hint"))
+        self.uses_title = "title" in self.regexes
+
+
+class _WindowFacts:
+    # /proc is read lazily, only when a candidate rule asks for it
+    def __init__(self, window, res_class, res_name, title):
+        self.window = window
+        self.res_class = res_class
+        self.res_name = res_name
+        self.title = title
+        self._proc = {}
+        self.proc_reads = 0
+
+    def get(self, field):
+        if field == "res_name":
+            return self.res_name
+        if field == "title":
+            return self.title
+        if field not in self._proc:
+            self._proc[field] = self._read_proc(field)
+        return self._proc[field]
+
+    def _read_proc(self, field):
+        self.proc_reads += 1
+        pid = self.window.get_pid()
+        if pid <= 0:
+            return {} if field == "environ" else ""
+        name = "environ" if field == "environ" else field
+        try:
+            with open(f"/proc/{pid}/{name}", "rb") as f:
+                data = f.read()
+        except OSError:
+            return {} if field == "environ" else ""
+        if field == "environ":
+            env = {}
+            for item in data.split(b"\0"):
+                key, sep, value = item.partition(b"=")
+                if sep:
+                    env[key.decode(errors="replace")] = value.decode(errors="replace")
+            return env
+        return data.replace(b"\0", b" ").decode(errors="replace").strip()
+
+
+class WindowClassifier:
+    def __init__(self, desktop_index=None, rules_path=RULES_PATH):
+        self.desktop_index = desktop_index
+        self.rules_path = rules_path
+        self._table = {}  # res_class -> [_Rule] in priority order
+        self._wildcard = []  # rules that apply to any res_class
+        self._title_classes = set()  # res_classes with a rule that looks at the title
+        self._title_wildcard = False
+        self._memo = {}  # xid -> ((res_class, res_name, title), identifier)
+        self._hints = {}  # pid -> desktop id from the launch environment, "" when there is none
+        self._window_pids = {}  # xid -> pid, to drop a hint once the process has no windows left
+        self.stats = {
+            "rules": 0,
+            "classified": 0,
+            "memo_hits": 0,
+            "proc_reads": 0,
+            "hint_hits": 0,
+        }
+        self._compile(self._load_user_rules() + BUILTIN_RULES)
+
+    def classify(self, window):
+        class_group = window.get_class_group()
+        res_class = (class_group.get_res_class() or "").lower() if class_group else ""
+        res_name = (class_group.get_name() or "").lower() if class_group else ""
+        title = (window.get_name() or "") if self.uses_title(res_class) else ""
+
+        xid = window.get_xid()
+        inputs = (res_class, res_name, title)
+        cached = self._memo.get(xid)
+        if cached is not None and cached[0] == inputs:
+            self.stats["memo_hits"] += 1
+            return cached[1]
+
+        self.stats["classified"] += 1
+        self._window_pids[xid] = window.get_pid()
+        facts = _WindowFacts(window, res_class, res_name, title)
+        identifier = self._evaluate(facts)
+        self.stats["proc_reads"] += facts.proc_reads
+        self._memo[xid] = (inputs, identifier)
+        return identifier
+
+    def uses_title(self, res_class):
+        return self._title_wildcard or res_class in self._title_classes
+
+    def forget(self, window):
+        xid = window.get_xid()
+        self._memo.pop(xid, None)
+        pid = self._window_pids.pop(xid, None)
+        if pid is not None and pid not in self._window_pids.values():
+            self._hints.pop(pid, None)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["memoized"] = len(self._memo)
+        stats["hints"] = len(self._hints)
+        return stats
+
+    def _load_user_rules(self):
+        try:
+            with open(self.rules_path, "r", encoding="utf-8") as f:
+                rules = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            log("[CLASSIFIER] Cannot read %s: %s", self.rules_path, e, level="WARNING")
+            return []
+        if not isinstance(rules, list):
+            log("[CLASSIFIER] %s: expected a list of rules", self.rules_path, level="WARNING")
+            return []
+        return rules
+
+    def _compile(self, specs):
+        rules = []
+        for index, spec in enumerate(specs):
+            try:
+                rules.append(_Rule(spec, index))
+            except (KeyError, TypeError, AttributeError, re.error) as e:
+                log("[CLASSIFIER] Skipping rule %r: %s", spec, e, level="WARNING")
+
+        self._wildcard = [r for r in rules if r.res_classes is None]
+        specific = {}
+        for rule in rules:
+            for res_class in rule.res_classes or ():
+                specific.setdefault(res_class, []).append(rule)
+        # Each class gets its own rules merged with the wildcard ones, keeping file order
+        self._table = {
+            res_class: sorted(class_rules + self._wildcard, key=lambda r: r.index)
+            for res_class, class_rules in specific.items()
+        }
+        self._title_classes = {c for c, class_rules in self._table.items() if any(r.uses_title for r in class_rules)}
+        self._title_wildcard = any(r.uses_title for r in self._wildcard)
+        self.stats["rules"] = len(rules)
+
+    def _evaluate(self, facts):
+        for rule in self._table.get(facts.res_class, self._wildcard):
+            values = self._match(rule, facts)
+            if values is not None:
+                identifier = self._render(rule, facts, values)
+                if identifier:
+                    return identifier
+        return normalize_identifier(facts.res_class)
+
+    def _match(self, rule, facts):
+        groups = {}
+        for field, regex in rule.regexes.items():
+            m = regex.search(facts.get(field))
+            if m is None:
+                return None
+            groups.update({k: v for k, v in m.groupdict().items() if v is not None})
+            groups.setdefault("_captured", []).extend(g for g in m.groups() if g)
+
+        if rule.env:
+            env = facts.get("environ")
+            for name, regex in rule.env.items():
+                m = regex.search(env.get(name, ""))
+                if m is None:
+                    return None
+                groups.update({k: v for k, v in m.groupdict().items() if v is not None})
+                groups.setdefault("_captured", []).extend(g for g in m.groups() if g)
+
+        if rule.desktop_hint:
+            desktop_id = self._desktop_hint(facts)
+            if not desktop_id:
+                return None
+            groups["desktop_id"] = desktop_id
+        return groups
+
+    def _desktop_hint(self, facts):
+        # The launch environment never changes, so /proc/<pid>/environ is read once per
+        # process, not again for every window or reclassification
+        pid = facts.window.get_pid()
+        hint = self._hints.get(pid)
+        if hint is not None:
+            self.stats["hint_hits"] += 1
+            return hint
+        hint = self._read_desktop_hint(facts, pid)
+        if pid > 0:
+            self._hints[pid] = hint
+        return hint
+
+    def _read_desktop_hint(self, facts, pid):
+        env = facts.get("environ")
+        # Inherited by every child process; only trust it for the process GIO actually launched.
+        # BAMF_DESKTOP_FILE_HINT has no such PID and would group a terminal's children under it.
+        if env.get("GIO_LAUNCHED_DESKTOP_FILE_PID") != str(pid):
+            return ""
+        path = env.get("GIO_LAUNCHED_DESKTOP_FILE", "")
+        if not path.endswith(".desktop"):
+            return ""
+
+        # Same identifier a pinned icon for this .desktop file gets
+        entry = self.desktop_index.get(path) if self.desktop_index is not None else None
+        basename = os.path.basename(path)[:-len(".desktop")]
+        return normalize_identifier((entry or {}).get("wm_class") or basename)
+
+    def _render(self, rule, facts, groups):
+        captured = groups.pop("_captured", [])
+        values = dict(groups)
+        values["res_class"] = normalize_identifier(facts.res_class)
+        values["res_name"] = facts.res_name
+        values["digest"] = stable_digest(*captured) if captured else ""
+        try:
+            return rule.identifier.format(**values)
+        except (KeyError, IndexError, ValueError) as e:
+            log("[CLASSIFIER] Bad identifier template %r: %s", rule.identifier, e, level="WARNING")
+            return ""
@@ -0,0 +1,295 @@
+# plugins/icon_panel/desktop_index.py
+
+import json
+import os
+import stat
+from gi.repository import Gio, GLib
+from core.config_store import config_store
+from core.utils import log
+
+CACHE_PATH = os.path.expanduser("~/.config/BrujoDock/desktop_index.json")
+CACHE_VERSION = 2
+# Coalesce bursts of file events (package upgrades touch many entries) into one write
+SAVE_DELAY_S = 2
+
+
+def application_dirs():
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    # Flatpak and Snap only add their export dirs to XDG_DATA_DIRS in login shells
+    data_dirs += [
+        os.path.join(data_home, "flatpak/exports/share"),
+        "/var/lib/flatpak/exports/share",
+    ]
+
+    dirs = [os.path.join(d, "applications") for d in [data_home] + data_dirs if d]
+    dirs.append("/var/lib/snapd/desktop/applications")
+
+    desktop = GLib.get_user_special_dir(GLib.UserDirectory.DIRECTORY_DESKTOP)
+    if desktop:
+        dirs.append(desktop)
+
+    # Earlier dirs take precedence, as in the XDG menu spec
+    return list(dict.fromkeys(os.path.normpath(d) for d in dirs))
+
+
+def _dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _fingerprint(path):
+    # Edits in place do not touch the directory mtime; the file's own mtime and size do
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def parse_desktop_file(path):
+    keyfile = GLib.KeyFile()
+    try:
+        keyfile.load_from_file(path, GLib.KeyFileFlags.NONE)
+    except GLib.Error:
+        return None
+
+    def get(key):
+        try:
+            return keyfile.get_string("Desktop Entry", key) or ""
+        except GLib.Error:
+            return ""
+
+    try:
+        actions = [a for a in keyfile.get_string_list("Desktop Entry", "Actions") if a]
+    except GLib.Error:
+        actions = []
+
+    return {
+        "name": get("Name"),
+        "icon": get("Icon"),
+        "exec": get("Exec"),
+        "wm_class": get("StartupWMClass"),
+        "actions": actions,
+    }
+
+
+class DesktopIndex:
+    def __init__(self, cache_path=CACHE_PATH, dirs=None):
+        self.cache_path = cache_path
+        self.dirs = dirs if dirs is not None else application_dirs()
+        self._entries = {}  # path -> entry dict
+        self._fingerprints = {}  # path -> [st_mtime_ns, st_size] the entry was parsed from
+        self._dir_mtimes = {}  # dir -> st_mtime_ns or None
+        self._rank = {d: i for i, d in enumerate(self.dirs)}
+        self._by_wm_class = {}  # lowercased StartupWMClass -> path
+        self._by_basename = {}  # lowercased file name without .desktop -> path
+        self._wm_class_paths = {}  # lowercased StartupWMClass -> {path}, every candidate
+        self._basename_paths = {}  # lowercased file name without .desktop -> {path}
+        self._monitors = []
+        self._app_monitor = None
+        self._app_monitor_id = None
+        self._save_id = None
+        self.stats = {
+            "cache_loaded": False,
+            "dirs_scanned": 0,
+            "files_parsed": 0,
+            "file_events": 0,
+        }
+
+        cached = self._load_cache()
+        changed = False
+        unchanged_dirs = set()
+        for d in self.dirs:
+            mtime = _dir_mtime(d)
+            if d in cached and cached[d] == mtime:
+                self._dir_mtimes[d] = mtime
+                unchanged_dirs.add(d)
+            else:
+                self._scan_dir(d)
+                changed = True
+
+        # Same file list; re-parse only the entries whose file was rewritten
+        for path in [p for p in self._entries if os.path.dirname(p) in unchanged_dirs]:
+            if _fingerprint(path) != self._fingerprints.get(path):
+                self._update_file(path)
+                changed = True
+
+        self._rebuild_keys()
+        if changed:
+            self._save()
+
+    def get(self, path):
+        entry = self._entries.get(path)
+        if entry is None and path and os.path.isfile(path):
+            # Pinned entries outside the indexed dirs
+            entry = parse_desktop_file(path)
+            self.stats["files_parsed"] += 1
+            if entry is not None:
+                self._entries[path] = entry
+        return entry
+
+    def find(self, identifier):
+        if not identifier:
+            return None
+        key = identifier.lower()
+        return self._by_wm_class.get(key) or self._by_basename.get(key)
+
+    def watch(self):
+        for d in self.dirs:
+            if not os.path.isdir(d):
+                continue
+            try:
+                monitor = Gio.File.new_for_path(d).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            except GLib.Error as e:
+                log("[DESKTOP_INDEX] Cannot monitor %s: %s", d, e, level="WARNING")
+                continue
+            monitor.connect("changed", self._on_file_changed, d)
+            self._monitors.append(monitor)
+
+        # Catches dirs that appear later (first Flatpak install) and anything the file monitors missed
+        self._app_monitor = Gio.AppInfoMonitor.get()
+        self._app_monitor_id = self._app_monitor.connect("changed", self._on_app_info_changed)
+
+    def close(self):
+        for monitor in self._monitors:
+            monitor.cancel()
+        self._monitors = []
+        if self._app_monitor is not None:
+            self._app_monitor.disconnect(self._app_monitor_id)
+            self._app_monitor = None
+        if self._save_id is not None:
+            GLib.source_remove(self._save_id)
+            self._save_id = None
+            self._save()
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["entries"] = len(self._entries)
+        return stats
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+
+        dirs = data.get("dirs", {})
+        fingerprints = data.get("files", {})
+        for path, entry in data.get("entries", {}).items():
+            if os.path.dirname(path) in dirs:
+                self._entries[path] = entry
+                self._fingerprints[path] = fingerprints.get(path)
+        self.stats["cache_loaded"] = True
+        return dirs
+
+    def _save(self):
+        self._save_id = None
+        paths = [p for p in self._entries if os.path.dirname(p) in self._dir_mtimes]
+        config_store.save(self.cache_path, {
+            "version": CACHE_VERSION,
+            "dirs": self._dir_mtimes,
+            "files": {p: self._fingerprints.get(p) for p in paths},
+            "entries": {p: self._entries[p] for p in paths},
+        })
+        return False
+
+    def _schedule_save(self):
+        if self._save_id is None:
+            self._save_id = GLib.timeout_add_seconds(SAVE_DELAY_S, self._save)
+
+    def _scan_dir(self, d):
+        for path in [p for p in self._entries if os.path.dirname(p) == d]:
+            del self._entries[path]
+            self._fingerprints.pop(path, None)
+
+        self._dir_mtimes[d] = _dir_mtime(d)
+        self.stats["dirs_scanned"] += 1
+        try:
+            names = os.listdir(d)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".desktop"):
+                self._update_file(os.path.join(d, name))
+
+    def _update_file(self, path):
+        fingerprint = _fingerprint(path)
+        entry = parse_desktop_file(path) if fingerprint is not None else None
+        self.stats["files_parsed"] += 1
+        if entry is None:
+            self._entries.pop(path, None)
+            self._fingerprints.pop(path, None)
+        else:
+            self._entries[path] = entry
+            self._fingerprints[path] = fingerprint
+
+    def _precedence(self, path):
+        return self._rank.get(os.path.dirname(path), len(self._rank)), path
+
+    def _entry_keys(self, path, entry):
+        yield self._basename_paths, self._by_basename, os.path.basename(path)[:-len(".desktop")].lower()
+        if entry["wm_class"]:
+            yield self._wm_class_paths, self._by_wm_class, entry["wm_class"].lower()
+
+    def _rebuild_keys(self):
+        self._wm_class_paths = {}
+        self._basename_paths = {}
+        for path, entry in self._entries.items():
+            for candidates, _lookup, key in self._entry_keys(path, entry):
+                candidates.setdefault(key, set()).add(path)
+        self._by_wm_class = {k: min(paths, key=self._precedence) for k, paths in self._wm_class_paths.items()}
+        self._by_basename = {k: min(paths, key=self._precedence) for k, paths in self._basename_paths.items()}
+
+    def _relink(self, path, old_entry):
+        # One file changed: only the keys it had or has now pick their winner again
+        keys = []
+        if old_entry is not None:
+            for candidates, lookup, key in self._entry_keys(path, old_entry):
+                candidates.get(key, set()).discard(path)
+                keys.append((candidates, lookup, key))
+        entry = self._entries.get(path)
+        if entry is not None:
+            for candidates, lookup, key in self._entry_keys(path, entry):
+                candidates.setdefault(key, set()).add(path)
+                keys.append((candidates, lookup, key))
+
+        for candidates, lookup, key in keys:
+            paths = candidates.get(key)
+            if paths:
+                lookup[key] = min(paths, key=self._precedence)
+            else:
+                candidates.pop(key, None)
+                lookup.pop(key, None)
+
+    def _on_file_changed(self, monitor, file, other_file, event_type, d):
+        paths = [f.get_path() for f in (file, other_file) if f is not None]
+        paths = [p for p in paths if p and p.endswith(".desktop")]
+        if not paths or event_type == Gio.FileMonitorEvent.ATTRIBUTE_CHANGED:
+            return
+
+        self.stats["file_events"] += 1
+        for path in paths:
+            if os.path.dirname(path) in self._dir_mtimes:
+                old_entry = self._entries.get(path)
+                self._update_file(path)
+                self._relink(path, old_entry)
+        self._dir_mtimes[d] = _dir_mtime(d)
+        self._schedule_save()
+
+    def _on_app_info_changed(self, monitor):
+        changed = False
+        for d in self.dirs:
+            if _dir_mtime(d) != self._dir_mtimes.get(d):
+                self._scan_dir(d)
+                changed = True
+        if changed:
+            self._rebuild_keys()
+            self._schedule_save()
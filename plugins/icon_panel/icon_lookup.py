@@ -0,0 +1,213 @@
+# plugins/icon_panel/icon_lookup.py
+
+import os
+import time
+import gi
+gi.require_version('Gtk', '3.0')
+gi.require_version('GdkPixbuf', '2.0')
+from gi.repository import GdkPixbuf, Gio, GLib, Gtk
+from .icon_store import surface_from_pixbuf
+from core.utils import log
+
+# Failed lookups are not retried before this, unless a monitor reports new icons
+MISS_TTL_S = 300
+# Package installs write many icons in a row; report them as one change
+CHANGE_DELAY_MS = 500
+_ICON_EXTENSIONS = (".png", ".svg", ".svgz", ".xpm")
+
+
+def icon_base_dirs():
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    data_dirs += [os.path.join(data_home, "flatpak/exports/share"), "/var/lib/flatpak/exports/share"]
+    dirs = [os.path.expanduser("~/.icons")] + [os.path.join(d, "icons") for d in [data_home] + data_dirs if d]
+    return list(dict.fromkeys(os.path.normpath(d) for d in dirs))
+
+
+def _pixmap_dirs():
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    return list(dict.fromkeys(os.path.normpath(os.path.join(d, "pixmaps")) for d in data_dirs if d))
+
+
+def _icon_name_from_path(path):
+    name, ext = os.path.splitext(os.path.basename(path))
+    return name if ext in _ICON_EXTENSIONS else None
+
+
+class IconLookup:
+    def __init__(self, on_change=None):
+        # on_change(names): names is a set of icon names that appeared, changed or
+        # disappeared, or None when it is unknown which ones (theme switch, cache rebuild)
+        self.on_change = on_change
+        self._theme = Gtk.IconTheme.get_default()
+        self.theme_name = self._current_theme()
+        self._misses = {}  # (icon_name, size, scale) -> monotonic expiry
+        self._monitors = []
+        self._theme_handler = None
+        self._changed_names = set()
+        self._changed_unknown = False
+        self._change_id = None
+        self._rescanning = False
+        self.stats = {
+            "lookups": 0,
+            "misses": 0,
+            "negative_hits": 0,
+            "theme_changes": 0,
+            "file_events": 0,
+        }
+
+    # Theme lookups stay on the main thread (GtkIconTheme is not thread-safe).
+    # Returns a file path to hand to IconStore.load_file, a ready surface, or None.
+    def resolve_name(self, icon_name, size, scale=1):
+        key = (icon_name, size, scale)
+        expiry = self._misses.get(key)
+        if expiry is not None:
+            if time.monotonic() < expiry:
+                self.stats["negative_hits"] += 1
+                return None
+            del self._misses[key]
+
+        self.stats["lookups"] += 1
+        info = self._theme.lookup_icon_for_scale(icon_name, size, scale, Gtk.IconLookupFlags.FORCE_SIZE)
+        if info is None:
+            self.stats["misses"] += 1
+            self._misses[key] = time.monotonic() + MISS_TTL_S
+            return None
+        return self._resolve_info(info, scale)
+
+    def resolve_gicon(self, gicon, size, scale=1):
+        if gicon is None:
+            return None
+        if isinstance(gicon, GdkPixbuf.Pixbuf):
+            # Icons set by the window itself: already decoded, nothing to cache
+            px = size * scale
+            if gicon.get_width() != px or gicon.get_height() != px:
+                gicon = gicon.scale_simple(px, px, GdkPixbuf.InterpType.BILINEAR)
+            return surface_from_pixbuf(gicon, scale)
+        if isinstance(gicon, Gio.FileIcon):
+            return gicon.get_file().get_path()
+
+        info = self._theme.lookup_by_gicon_for_scale(gicon, size, scale, Gtk.IconLookupFlags.FORCE_SIZE)
+        return self._resolve_info(info, scale)
+
+    def watch(self):
+        self._theme_handler = self._theme.connect("changed", self._on_theme_changed)
+        self._watch_dirs()
+
+    def close(self):
+        if self._theme_handler is not None:
+            self._theme.disconnect(self._theme_handler)
+            self._theme_handler = None
+        self._unwatch_dirs()
+        if self._change_id is not None:
+            GLib.source_remove(self._change_id)
+            self._change_id = None
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["negative_entries"] = len(self._misses)
+        stats["monitors"] = len(self._monitors)
+        return stats
+
+    def _current_theme(self):
+        settings = Gtk.Settings.get_default()
+        return settings.get_property("gtk-icon-theme-name") if settings else ""
+
+    def _resolve_info(self, info, scale):
+        if info is None:
+            return None
+        path = info.get_filename()
+        if path and not path.startswith("resource:"):
+            return path
+        return surface_from_pixbuf(info.load_icon(), scale)
+
+    def _watch_dirs(self):
+        # App icons live in <theme>/<size>/apps; the theme dir itself catches icon-theme.cache rebuilds
+        dirs = []
+        for base in icon_base_dirs():
+            for theme_name in dict.fromkeys((self.theme_name, "hicolor")):
+                theme_dir = os.path.join(base, theme_name)
+                if not os.path.isdir(theme_dir):
+                    continue
+                dirs.append(theme_dir)
+                try:
+                    sizes = os.listdir(theme_dir)
+                except OSError:
+                    continue
+                for size_dir in sizes:
+                    apps_dir = os.path.join(theme_dir, size_dir, "apps")
+                    if os.path.isdir(apps_dir):
+                        dirs.append(apps_dir)
+        dirs += [d for d in _pixmap_dirs() if os.path.isdir(d)]
+
+        for d in dirs:
+            try:
+                monitor = Gio.File.new_for_path(d).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            except GLib.Error as e:
+                log("[ICON_LOOKUP] Cannot monitor %s: %s", d, e, level="WARNING")
+                continue
+            monitor.connect("changed", self._on_file_changed)
+            self._monitors.append(monitor)
+
+    def _unwatch_dirs(self):
+        for monitor in self._monitors:
+            monitor.cancel()
+        self._monitors = []
+
+    def _on_theme_changed(self, theme):
+        if self._rescanning:
+            # Our own rescan after a file event; the names are already queued
+            return
+        self.stats["theme_changes"] += 1
+        theme_name = self._current_theme()
+        if theme_name != self.theme_name:
+            log("[ICON_LOOKUP] Icon theme: %s -> %s", self.theme_name, theme_name)
+            self.theme_name = theme_name
+            self._unwatch_dirs()
+            self._watch_dirs()
+        self._misses.clear()
+        self._queue_change(None)
+
+    def _on_file_changed(self, monitor, file, other_file, event_type):
+        if event_type == Gio.FileMonitorEvent.ATTRIBUTE_CHANGED:
+            return
+        self.stats["file_events"] += 1
+        names = set()
+        for f in (file, other_file):
+            path = f.get_path() if f is not None else None
+            if not path:
+                continue
+            name = _icon_name_from_path(path)
+            if name is not None:
+                names.add(name)
+            elif os.path.basename(path) == "icon-theme.cache":
+                names = None
+                break
+        if names is None or names:
+            self._queue_change(names)
+
+    def _queue_change(self, names):
+        if names is None:
+            self._changed_unknown = True
+            self._misses.clear()
+        else:
+            self._changed_names.update(names)
+            for key in [k for k in self._misses if k[0] in names]:
+                del self._misses[key]
+        if self._change_id is None:
+            self._change_id = GLib.timeout_add(CHANGE_DELAY_MS, self._emit_change)
+
+    def _emit_change(self):
+        self._change_id = None
+        # GtkIconTheme only notices new files on its own every few seconds
+        self._rescanning = True
+        try:
+            self._theme.rescan_if_needed()
+        finally:
+            self._rescanning = False
+        names = None if self._changed_unknown else self._changed_names
+        self._changed_names = set()
+        self._changed_unknown = False
+        if self.on_change:
+            self.on_change(names)
+        return False
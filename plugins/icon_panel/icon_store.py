@@ -0,0 +1,318 @@
+# plugins/icon_panel/icon_store.py
+
+import json
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import cairo
+import gi
+gi.require_version('Gtk', '3.0')
+gi.require_version('GdkPixbuf', '2.0')
+from gi.repository import Gdk, GdkPixbuf, GLib, Gtk
+from core.config_store import write_atomic
+from core.startup_profiler import profiler
+from core.utils import log
+
+CACHE_PATH = os.path.expanduser("~/.config/BrujoDock/icon_cache.bin")
+CACHE_MAGIC = b"BDICONS1"
+# magic, index offset, index length; rasters follow the header, the JSON index comes last
+_HEADER = struct.Struct("<8sQQ")
+_ALIGN = 16
+_DATA_START = 32
+SAVE_DELAY_S = 5
+DECODE_WORKERS = 2
+
+
+def placeholder_surface(size):
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
+    cr = cairo.Context(surface)
+    cr.set_source_rgb(0.8, 0.8, 0.8)
+    cr.rectangle(4, 4, size - 8, size - 8)
+    cr.fill()
+    return surface
+
+
+def surface_from_pixbuf(pixbuf, scale=1):
+    # Always ARGB32 so the pixels can be written to the cache file as they are
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, pixbuf.get_width(), pixbuf.get_height())
+    cr = cairo.Context(surface)
+    Gdk.cairo_set_source_pixbuf(cr, pixbuf, 0, 0)
+    cr.paint()
+    surface.flush()
+    surface.set_device_scale(scale, scale)
+    return surface
+
+
+def _current_theme():
+    settings = Gtk.Settings.get_default()
+    return settings.get_property("gtk-icon-theme-name") if settings else ""
+
+
+class IconStore:
+    def __init__(self, budget_bytes=8 * 1024 * 1024, cache_path=CACHE_PATH):
+        self.budget_bytes = budget_bytes
+        self.cache_path = cache_path
+        self.theme_name = _current_theme()
+        self._surfaces = OrderedDict()  # (path, size, scale) -> (surface, nbytes)
+        self._bytes = 0
+        self._session = {}  # (path, size, scale) -> mtime_ns decoded this session, added on save
+        self._map = None
+        self._mapped = {}  # (path, size, scale) -> (mtime_ns, offset, width, height, stride)
+        self._save_id = None
+        self._saving = False
+        self._executor = None
+        self._pending = {}  # (path, size, scale) -> [callback], merges duplicate requests
+        self.stats = {
+            "hits": 0,
+            "mapped_hits": 0,
+            "decodes": 0,
+            "decode_errors": 0,
+            "merged_requests": 0,
+            "evictions": 0,
+        }
+        self._open_cache()
+
+    # Returns the surface when it is already in memory or in the cache file. Otherwise
+    # decodes it on a worker thread and calls callback(surface or None) on the main loop;
+    # a file that cannot be stat'ed gets callback(None) right away.
+    def load_file(self, path, size, scale, callback):
+        key = (path, size, scale)
+        cached = self._surfaces.get(key)
+        if cached is not None:
+            self._surfaces.move_to_end(key)
+            self.stats["hits"] += 1
+            return cached[0]
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            callback(None)
+            return None
+
+        surface = self._from_map(key, mtime)
+        if surface is not None:
+            self._remember(key, surface)
+            return surface
+
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            self.stats["merged_requests"] += 1
+            callbacks.append(callback)
+            return None
+
+        self._pending[key] = [callback]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="icon-decode")
+        future = self._executor.submit(GdkPixbuf.Pixbuf.new_from_file_at_size, path, size * scale, size * scale)
+        future.add_done_callback(lambda f: GLib.idle_add(self._on_decoded, key, mtime, f))
+        return None
+
+    def forget(self, path):
+        # The file changed on disk; the next load_file re-checks its mtime
+        for key in [k for k in self._surfaces if k[0] == path]:
+            _surface, nbytes = self._surfaces.pop(key)
+            self._bytes -= nbytes
+        for key in [k for k in self._session if k[0] == path]:
+            del self._session[key]
+        for key in [k for k in self._mapped if k[0] == path]:
+            del self._mapped[key]
+
+    def set_theme(self, theme_name):
+        # Icon files resolve differently under the new theme; the cache file is
+        # rewritten for it on the next save
+        if theme_name == self.theme_name:
+            return
+        self.theme_name = theme_name
+        self._surfaces.clear()
+        self._session.clear()
+        self._bytes = 0
+        self._map = None
+        self._mapped = {}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+        if self._save_id is not None:
+            GLib.source_remove(self._save_id)
+            self._save_id = None
+            # Last chance on unload; the write runs here instead of on a worker
+            self._write_cache(self._snapshot(), self.theme_name)
+        self._surfaces.clear()
+        self._session.clear()
+        self._bytes = 0
+        # Surfaces still on screen may point into the mapping; it is released with them
+        self._map = None
+        self._mapped = {}
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["entries"] = len(self._surfaces)
+        stats["bytes"] = self._bytes
+        stats["mapped"] = len(self._mapped)
+        return stats
+
+    def _on_decoded(self, key, mtime, future):
+        callbacks = self._pending.pop(key, None)
+        if callbacks is None:
+            # Store was closed while the decode was running
+            return False
+
+        surface = None
+        try:
+            surface = surface_from_pixbuf(future.result(), key[2])
+        except Exception as e:
+            self.stats["decode_errors"] += 1
+            log("[ICON_STORE] Cannot decode %s: %s", key[0], e, level="WARNING")
+        if surface is not None:
+            self.stats["decodes"] += 1
+            self._session[key] = mtime
+            self._remember(key, surface)
+            self._schedule_save()
+
+        for callback in callbacks:
+            callback(surface)
+        if not self._pending:
+            profiler.mark("icon_panel:icons_decoded")
+        return False
+
+    def _remember(self, key, surface):
+        nbytes = surface.get_stride() * surface.get_height()
+        self._surfaces[key] = (surface, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.budget_bytes and len(self._surfaces) > 1:
+            _key, (_surface, evicted) = self._surfaces.popitem(last=False)
+            self._bytes -= evicted
+            self.stats["evictions"] += 1
+
+    def _from_map(self, key, mtime):
+        entry = self._mapped.get(key)
+        if entry is None or entry[0] != mtime:
+            return None
+        _mtime, offset, width, height, stride = entry
+        data = memoryview(self._map)[offset:offset + stride * height]
+        surface = cairo.ImageSurface.create_for_data(data, cairo.FORMAT_ARGB32, width, height, stride)
+        surface.set_device_scale(key[2], key[2])
+        self.stats["mapped_hits"] += 1
+        return surface
+
+    def _open_cache(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                # ACCESS_COPY: pages are shared with the page cache but writable for cairo
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return
+
+        try:
+            magic, index_offset, index_len = _HEADER.unpack_from(self._map, 0)
+            if magic != CACHE_MAGIC:
+                raise ValueError("bad magic")
+            index = json.loads(bytes(self._map[index_offset:index_offset + index_len]))
+        except (struct.error, ValueError) as e:
+            log("[ICON_STORE] Ignoring cache file: %s", e, level="WARNING")
+            self._map = None
+            return
+
+        if index.get("theme") != self.theme_name:
+            self._map = None
+            return
+
+        for path, size, scale, mtime, offset, width, height, stride in index["entries"]:
+            self._mapped[(path, size, scale)] = (mtime, offset, width, height, stride)
+
+    def _schedule_save(self):
+        if self._save_id is None:
+            self._save_id = GLib.timeout_add_seconds(SAVE_DELAY_S, self._save)
+
+    def _snapshot(self):
+        # (key, mtime, width, height, stride, pixels, recheck) for everything the new file
+        # keeps: icons decoded this session that are still in memory, then the entries of
+        # the current file, which the writer drops if their source changed since.
+        # Evicted icons are decoded again next time.
+        snapshot = []
+        for key, mtime in self._session.items():
+            cached = self._surfaces.get(key)
+            if cached is None:
+                continue
+            surface = cached[0]
+            surface.flush()
+            snapshot.append((key, mtime, surface.get_width(), surface.get_height(), surface.get_stride(),
+                             bytes(surface.get_data()), False))
+
+        for key, (mtime, offset, width, height, stride) in self._mapped.items():
+            if key not in self._session:
+                snapshot.append((key, mtime, width, height, stride, self._map[offset:offset + stride * height], True))
+        return snapshot
+
+    def _save(self):
+        self._save_id = None
+        if self._saving:
+            # One writer at a time; the icons decoded meanwhile go into the next file
+            self._schedule_save()
+            return False
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="icon-decode")
+        self._saving = True
+        theme_name = self.theme_name
+        future = self._executor.submit(self._write_cache, self._snapshot(), theme_name)
+        future.add_done_callback(lambda f: GLib.idle_add(self._on_saved, theme_name, f))
+        return False
+
+    def _write_cache(self, snapshot, theme_name):
+        # Runs on a worker thread; returns the session entries that made it into the
+        # file, or None when it could not be written
+        entries = []
+        chunks = []
+        saved = {}
+        offset = _DATA_START
+        for (path, size, scale), mtime, width, height, stride, data, recheck in snapshot:
+            if recheck:
+                try:
+                    if os.stat(path).st_mtime_ns != mtime:
+                        continue
+                except OSError:
+                    continue
+            else:
+                saved[(path, size, scale)] = mtime
+            entries.append([path, size, scale, mtime, offset, width, height, stride])
+            padded = -(-len(data) // _ALIGN) * _ALIGN
+            chunks.append(data)
+            chunks.append(bytes(padded - len(data)))
+            offset += padded
+
+        index = json.dumps({"theme": theme_name, "entries": entries}).encode()
+        header = _HEADER.pack(CACHE_MAGIC, offset, len(index)) + bytes(_DATA_START - _HEADER.size)
+        try:
+            write_atomic(self.cache_path, [header, *chunks, index])
+        except OSError as e:
+            log("[ICON_STORE] Cannot write cache: %s", e, level="WARNING")
+            return None
+        return saved
+
+    def _on_saved(self, theme_name, future):
+        self._saving = False
+        if self._executor is None:
+            # Store was closed while the write was running
+            return False
+        try:
+            saved = future.result()
+        except Exception as e:
+            log("[ICON_STORE] Cannot write cache: %s", e, level="WARNING")
+            return False
+        if saved is None or theme_name != self.theme_name:
+            # Nothing new on disk, or a file for the theme that was just left
+            return False
+
+        # Everything saved is now served from the new file. Surfaces created from the
+        # old mapping keep it alive until they are dropped.
+        for key, mtime in saved.items():
+            if self._session.get(key) == mtime:
+                del self._session[key]
+        self._map = None
+        self._mapped = {}
+        self._open_cache()
+        return False
@@ -3,10 +3,22 @@ import gi
 gi.require_version('Wnck', '3.0')
 from gi.repository import Wnck, Gdk, Gtk, GLib
 from .app_icon_list import AppIconList
+from .classifier import WindowClassifier
+from .desktop_index import DesktopIndex
+from .icon_lookup import IconLookup
+from .icon_store import IconStore, placeholder_surface
 from core.utils import log
+from core.startup_profiler import profiler
 import os
+import time
+from collections import OrderedDict
 from core.i18n import _
 
+# Time budget for one idle slice of the startup window enumeration
+ENUMERATION_SLICE_S = 0.004
+# Same for icon resolution (theme lookups, window icons), kept off the draw handler
+RESOLVE_SLICE_S = 0.004
+
 
 class Plugin(PluginBase):
     name = "Icon Panel"
@@ -27,49 +39,188 @@ class Plugin(PluginBase):
         "icon_highlight_color": "#00cc00",
         "icon_highlight_height": 4,
         "hint_mode": 1,
+        "icon_cache_budget_kb": 8192,
     }
 
     def __init__(self, dock):
         super().__init__(dock)
         pinned_paths = self.settings.get("pinned", [])
-        log(f"[ICON_PANEL] Загружаем pinned: {pinned_paths}")
-        self.icon_list = AppIconList(self._load_pinned())
+        log("[ICON_PANEL] Загружаем pinned: %s", pinned_paths, level="INFO")
+        self.desktop_index = DesktopIndex()
+        self.desktop_index.watch()
+        self.icon_store = IconStore(self.settings.get("icon_cache_budget_kb", 8192) * 1024)
+        self.icon_lookup = IconLookup(self._on_icons_changed)
+        self.icon_lookup.watch()
+        self.classifier = WindowClassifier(self.desktop_index)
+        self.icon_list = AppIconList(self._load_pinned(), self.desktop_index)
+        self._placeholder = None
+        self._resolve_queue = OrderedDict()  # AppIcon -> None, in request order
+        self._resolve_id = None
+        for icon in self.icon_list.icons:
+            self._request_icon(icon)
         self._setup_window_monitoring()
         self._setup_hover_handler()
         self._setup_active_window_handler()
-        self._setup_click_handler()
+
+    def unload(self):
+        super().unload()
+        screen = Wnck.Screen.get_default()
+        for handler_id in self._screen_handlers:
+            screen.disconnect(handler_id)
+        self._screen_handlers = []
+        for window, handler_ids in self._window_handlers.values():
+            for handler_id in handler_ids:
+                window.disconnect(handler_id)
+        self._window_handlers = {}
+        for source_id in (self._startup_id, self._window_events_id, self._resolve_id):
+            if source_id is not None:
+                GLib.source_remove(source_id)
+        self._startup_id = self._window_events_id = self._resolve_id = None
+        self._resolve_queue.clear()
+        self.desktop_index.close()
+        self.icon_store.close()
+        self.icon_lookup.close()
+
+    def get_diagnostics(self):
+        stats = {f"desktop_{key}": value for key, value in self.desktop_index.get_stats().items()}
+        stats.update({f"icons_{key}": value for key, value in self.icon_store.get_stats().items()})
+        stats.update({f"lookup_{key}": value for key, value in self.icon_lookup.get_stats().items()})
+        stats.update({f"classifier_{key}": value for key, value in self.classifier.get_stats().items()})
+        return stats
 
     def _setup_window_monitoring(self):
+        self._window_events = []  # (kind, window), applied once per main-loop pass
+        self._window_events_id = None
+        self._window_handlers = {}  # xid -> (window, [handler ids])
         screen = Wnck.Screen.get_default()
-        screen.connect("window-opened", self._on_window_opened)
-        screen.connect("window-closed", self._on_window_closed)
         screen.force_update()
-        for window in screen.get_windows():
-            self._on_window_opened(screen, window)
+        # Existing windows are classified in idle slices so the first frame is not held up
+        self._startup_windows = OrderedDict((w.get_xid(), w) for w in screen.get_windows())
+        self._startup_id = GLib.idle_add(self._enumerate_windows)
+        self._screen_handlers = [
+            screen.connect("window-opened", self._on_window_opened),
+            screen.connect("window-closed", self._on_window_closed),
+        ]
+
+    def _enumerate_windows(self):
+        deadline = time.monotonic() + ENUMERATION_SLICE_S
+        changed = False
+        while self._startup_windows:
+            _xid, window = self._startup_windows.popitem(last=False)
+            changed |= self._add_window(window)
+            if time.monotonic() >= deadline:
+                break
+
+        if changed:
+            # The active window may have been reported before its icon existed
+            self._on_active_window_changed(Wnck.Screen.get_default(), None)
+            self.queue_layout()
+            self.queue_redraw()
+        if self._startup_windows:
+            return True
+        self._startup_id = None
+        profiler.mark("icon_panel:windows_enumerated")
+        return False
 
     def _on_window_opened(self, screen, window):
+        self._queue_window_event("open", window)
+
+    def _on_window_closed(self, screen, window):
+        self._startup_windows.pop(window.get_xid(), None)
+        self._queue_window_event("close", window)
+
+    def _on_window_class_changed(self, window):
+        self._queue_window_event("update", window)
+
+    def _on_window_name_changed(self, window):
+        # Titles change all the time; only matters when a rule for this class looks at them
+        class_group = window.get_class_group()
+        res_class = (class_group.get_res_class() or "").lower() if class_group else ""
+        if self.classifier.uses_title(res_class):
+            self._queue_window_event("update", window)
+
+    def _queue_window_event(self, kind, window):
+        self._window_events.append((kind, window))
+        if self._window_events_id is None:
+            self._window_events_id = GLib.idle_add(self._flush_window_events, priority=GLib.PRIORITY_HIGH_IDLE)
+
+    def _flush_window_events(self):
+        self._window_events_id = None
+        events, self._window_events = self._window_events, []
+        # Windows that open and close within one batch never get an icon
+        closed = {window.get_xid() for kind, window in events if kind == "close"}
+
+        changed = False
+        for kind, window in events:
+            if kind == "close":
+                changed |= self._remove_window(window)
+            elif window.get_xid() in closed:
+                continue
+            elif kind == "open":
+                changed |= self._add_window(window)
+            else:
+                changed |= self._reclassify_window(window)
+
+        if changed:
+            # The active window may have been reported before its icon existed
+            self._on_active_window_changed(Wnck.Screen.get_default(), None)
+            self.queue_layout()
+            self.queue_redraw()
+        return False
+
+    def _add_window(self, window):
         if window.get_pid() == os.getpid():
-            return
+            return False
         wtype = window.get_window_type()
         if wtype in (Wnck.WindowType.DESKTOP, Wnck.WindowType.DOCK, Wnck.WindowType.SPLASHSCREEN):
-            return
+            return False
 
         app = window.get_application()
         if not app:
-            return
+            return False
 
-        class_group = window.get_class_group()
-        wm_class = class_group.get_res_class() if class_group else ""
+        if not self._is_main_window(window):
+            return False
 
-        if self._is_main_window(window):
-            self.icon_list.add_window(wm_class, app, window)
-        self.dock.update_geometry()
-        self.dock.drawing_area.queue_draw()
+        self.icon_list.add_window(self.classifier.classify(window), app, window)
+        icon = self.icon_list.icon_for_window(window)
+        if icon is not None and window.get_xid() not in self._window_handlers:
+            self._window_handlers[window.get_xid()] = (window, [
+                window.connect("class-changed", self._on_window_class_changed),
+                window.connect("name-changed", self._on_window_name_changed),
+            ])
+        if icon is not None and icon.icon_missing:
+            # Cheap while the miss is cached; picks the icon up once the TTL runs out
+            icon.invalidate_icon()
+        if icon is not None:
+            self._request_icon(icon)
+        return icon is not None
+
+    def _remove_window(self, window):
+        self.classifier.forget(window)
+        handlers = self._window_handlers.pop(window.get_xid(), None)
+        if handlers is not None:
+            for handler_id in handlers[1]:
+                window.disconnect(handler_id)
+        if self.icon_list.icon_for_window(window) is None:
+            return False
+        self.icon_list.remove_window(window)
+        return True
 
-    def _on_window_closed(self, screen, window):
+    def _reclassify_window(self, window):
+        icon = self.icon_list.icon_for_window(window)
+        if icon is None:
+            return False
+        identifier = self.classifier.classify(window)
+        if identifier == icon.identifier:
+            return False
+        log("[ICON_PANEL] Window %s moved: %s -> %s", window.get_xid(), icon.identifier, identifier, level="INFO")
         self.icon_list.remove_window(window)
-        self.dock.update_geometry()
-        self.dock.drawing_area.queue_draw()
+        self.icon_list.add_window(identifier, window.get_application(), window)
+        icon = self.icon_list.icon_for_window(window)
+        if icon is not None:
+            self._request_icon(icon)
+        return True
 
     def _is_main_window(self, window):
         if window is None:
@@ -98,6 +249,59 @@ class Plugin(PluginBase):
         height = pad_top + icon_size + pad_bottom
         return (width, height)
 
+    def _cell_area(self, index):
+        s = self.settings
+        cell_w = s.get("icon_size", 32) + 2 * s.get("icon_padding_x", 2)
+        x = s.get("panel_padding_x", 4) + index * (cell_w + s.get("icon_spacing", 2))
+        return (x, 0, cell_w, self.get_preferred_size()[1])
+
+    def _on_icon_loaded(self, app_icon):
+        if app_icon in self.icon_list.icons:
+            self.queue_redraw(self._cell_area(self.icon_list.icons.index(app_icon)))
+
+    def _request_icon(self, icon):
+        self._resolve_queue[icon] = None
+        if self._resolve_id is None:
+            self._resolve_id = GLib.idle_add(self._resolve_icons)
+
+    def _resolve_icons(self):
+        deadline = time.monotonic() + RESOLVE_SLICE_S
+        size = self.settings.get("icon_size", 32)
+        scale = self.dock.window.get_scale_factor()
+        while self._resolve_queue:
+            icon, _ = self._resolve_queue.popitem(last=False)
+            if icon not in self.icon_list.icons or not icon.needs_icon(size, scale):
+                continue
+            icon.load_icon_surface(self.icon_store, self.icon_lookup, size, scale, self._on_icon_loaded)
+            # A synchronous hit (memory, mmap, window pixbuf) or the placeholder for a pending decode
+            self._on_icon_loaded(icon)
+            if time.monotonic() >= deadline:
+                break
+
+        if self._resolve_queue:
+            return True
+        self._resolve_id = None
+        return False
+
+    def _on_icons_changed(self, names):
+        # names=None: theme switched or its cache was rebuilt, every icon may resolve differently
+        if names is None:
+            self.icon_store.set_theme(self.icon_lookup.theme_name)
+        for icon in self.icon_list.icons:
+            if names is None:
+                affected = True
+            elif icon.icon_missing:
+                affected = not names.isdisjoint(icon.icon_candidates())
+            else:
+                affected = bool(icon.icon_path) and os.path.splitext(os.path.basename(icon.icon_path))[0] in names
+
+            if not affected:
+                continue
+            if names is not None and icon.icon_path:
+                self.icon_store.forget(icon.icon_path)
+            icon.invalidate_icon()
+            self._request_icon(icon)
+
     def _load_pinned(self):
         return self.settings.get("pinned", [])
 
@@ -115,12 +319,21 @@ class Plugin(PluginBase):
         g = int(highlight_color[3:5], 16) / 255.0
         b = int(highlight_color[5:7], 16) / 255.0
 
+        scale = self.dock.window.get_scale_factor()
+        clip_x1, _clip_y1, clip_x2, _clip_y2 = cr.clip_extents()
+        if self._placeholder is None or self._placeholder.get_width() != icon_size:
+            self._placeholder = placeholder_surface(icon_size)
+
         x = panel_pad_x
         for app_icon in self.icon_list.icons:
             total_w = icon_size + 2 * icon_pad_x
             cell_height = pad_top + icon_size + pad_bottom  # ← полная высота
             y = pad_top
 
+            if x >= clip_x2 or x + total_w <= clip_x1:
+                x += total_w + spacing
+                continue
+
             cr.save()
             cr.rectangle(x, 0, total_w, height)
             cr.clip()
@@ -142,64 +355,61 @@ class Plugin(PluginBase):
                 cr.rectangle(0, cell_height - h, total_w, h)
                 cr.fill()
 
-            if app_icon.icon_surface is None:
-                app_icon.load_icon_surface(icon_size)
-            if app_icon.icon_surface:
-                cr.set_source_surface(app_icon.icon_surface, icon_pad_x, y)
-                cr.paint()
+            if app_icon.needs_icon(icon_size, scale):
+                # Size or scale changed; resolved in the next idle slice
+                self._request_icon(app_icon)
+            surface = app_icon.icon_surface if app_icon.icon_surface is not None else self._placeholder
+            cr.set_source_surface(surface, icon_pad_x, y)
+            cr.paint()
 
-            if len(app_icon.running_windows) > 1:
-                app_icon._draw_badge(cr, x, y, s)
+            if app_icon.window_count() > 1:
+                app_icon._draw_badge(cr, x, y, s, self.dock.text_service)
 
             cr.restore()
             x += total_w + spacing
 
     def _setup_hover_handler(self):
-        self.dock.drawing_area.connect("motion-notify-event", self._on_motion)
-        self.dock.drawing_area.connect("leave-notify-event", self._on_leave)
-        self.dock.drawing_area.add_events(
-            Gdk.EventMask.POINTER_MOTION_MASK |
-            Gdk.EventMask.LEAVE_NOTIFY_MASK
-        )
-        self._last_hovered_index = None
-
-    def _on_motion(self, widget, event):
+        self._hovered_icon = None
+
+    def _icon_index_at(self, x):
         settings = self.settings
-        icon_size = settings.get("icon_size", 32)
-        panel_pad_x = settings.get("panel_padding_x", 4)
-        icon_pad_x = settings.get("icon_padding_x", 2)
-        spacing = settings.get("icon_spacing", 2)
+        icon_w = settings.get("icon_size", 32) + 2 * settings.get("icon_padding_x", 2)
+        pitch = icon_w + settings.get("icon_spacing", 2)
+        offset = x - settings.get("panel_padding_x", 4)
+        if offset < 0:
+            return None
+        index = int(offset // pitch)
+        if index >= len(self.icon_list.icons) or offset - index * pitch > icon_w:
+            return None
+        return index
+
+    def _set_hovered(self, icon):
+        previous = self._hovered_icon
+        if icon is previous:
+            return
+        icons = self.icon_list.icons
+        widget = self.dock.drawing_area
 
-        x = event.x - self.get_plugin_xpos()
-        index = 0
-        current_x = panel_pad_x
+        if previous is not None:
+            previous.set_hovered(False)
+            if previous in icons:
+                self.queue_redraw(self._cell_area(icons.index(previous)))
+        self._hovered_icon = icon
 
-        for icon in self.icon_list.icons:
-            icon_w = icon_size + 2 * icon_pad_x
-            if current_x <= x <= current_x + icon_w:
-                if index != self._last_hovered_index:
-                    for i, ic in enumerate(self.icon_list.icons):
-                        ic.set_hovered(i == index)
-
-                    hint_mode = settings.get("hint_mode", 1)
-                    if hint_mode == 1:
-                        hint_text = self._get_hint_text(icon)
-                        widget.set_tooltip_text(hint_text)
-                    else:
-                        widget.set_tooltip_text("")
-
-                    self._last_hovered_index = index
-                    self.dock.drawing_area.queue_draw()
-                return
-            current_x += icon_w + spacing
-            index += 1
-
-        if self._last_hovered_index is not None:
-            for ic in self.icon_list.icons:
-                ic.set_hovered(False)
-            self._last_hovered_index = None
+        if icon is None:
             widget.set_tooltip_text("")
-            self.dock.drawing_area.queue_draw()
+            return
+
+        icon.set_hovered(True)
+        if self.settings.get("hint_mode", 1) == 1:
+            widget.set_tooltip_text(self._get_hint_text(icon))
+        else:
+            widget.set_tooltip_text("")
+        self.queue_redraw(self._cell_area(icons.index(icon)))
+
+    def on_motion(self, x, y):
+        index = self._icon_index_at(x)
+        self._set_hovered(self.icon_list.icons[index] if index is not None else None)
 
     def _get_hint_text(self, icon) -> str:
         if not icon.running_windows:
@@ -211,69 +421,50 @@ class Plugin(PluginBase):
 
         return "\n".join(titles)
 
-    def _on_leave(self, widget, event):
-        for ic in self.icon_list.icons:
-            ic.set_hovered(False)
-        self._last_hovered_index = None
-        widget.set_tooltip_text("")
-        self.dock.drawing_area.queue_draw()
-        return False
+    def on_leave(self):
+        self._set_hovered(None)
 
     def _setup_active_window_handler(self):
         screen = Wnck.Screen.get_default()
-        screen.connect("active-window-changed", self._on_active_window_changed)
+        self._active_icon = None
+        self._screen_handlers.append(screen.connect("active-window-changed", self._on_active_window_changed))
         self._on_active_window_changed(screen, None)
 
     def _on_active_window_changed(self, screen, previous_window):
         active_window = screen.get_active_window()
         if active_window is None:
-            for icon in self.icon_list.icons:
-                icon.active = False
+            if self._active_icon is not None:
+                self._active_icon.active = False
+                self._active_icon = None
             return
 
         if not self._is_main_window(active_window):
             return
 
-        for icon in self.icon_list.icons:
-            icon.active = False
-
-        if active_window:
-            for icon in self.icon_list.icons:
-                if active_window in icon.running_windows:
-                    icon.active = True
-                    break
-
-        self.dock.drawing_area.queue_draw()
+        icon = self.icon_list.icon_for_window(active_window)
+        if icon is self._active_icon:
+            return
 
-    def _setup_click_handler(self):
-        self.dock.drawing_area.connect("button-press-event", self._on_button_press)
-        self.dock.drawing_area.add_events(Gdk.EventMask.BUTTON_PRESS_MASK)
+        if self._active_icon is not None:
+            self._active_icon.active = False
+        if icon is not None:
+            icon.active = True
+        self._active_icon = icon
 
-    def _on_button_press(self, widget, event):
-        settings = self.settings
-        icon_size = settings.get("icon_size", 32)
-        panel_pad_x = settings.get("panel_padding_x", 4)
-        icon_pad_x = settings.get("icon_padding_x", 2)
-        spacing = settings.get("icon_spacing", 2)
-        x = event.x - self.get_plugin_xpos()
-        button = event.button
-        index = 0
-        current_x = panel_pad_x
-
-        icon_w = icon_size + 2 * icon_pad_x
-        for icon in self.icon_list.icons:
-            if current_x <= x <= current_x + icon_w:
-                if button == 1:
-                    self._on_left_click(icon, event)
-                elif button == 3:
-                    log("[RIGHT CLICK HANDLER CALLED]")
+        self.queue_redraw()
 
-                    self._on_right_click(widget, event, icon)
-                return True
-            current_x += icon_w + spacing
-            index += 1
+    def on_button_press(self, x, y, event):
+        index = self._icon_index_at(x)
+        if index is None:
+            return False
 
-        return False
+        icon = self.icon_list.icons[index]
+        if event.button == 1:
+            self._on_left_click(icon, event)
+        elif event.button == 3:
+            log("[RIGHT CLICK HANDLER CALLED]")
+            self._on_right_click(self.dock.drawing_area, event, icon)
+        return True
 
     def _on_left_click(self, icon, event):
         windows = icon.running_windows
@@ -293,7 +484,7 @@ class Plugin(PluginBase):
             if app_info:
                 app_info.launch([], None)
         except Exception as e:
-            log(f"[LAUNCH] Ошибка запуска {desktop_path}: {e}")
+            log("[LAUNCH] Ошибка запуска %s: %s", desktop_path, e)
 
     def _toggle_window(self, window):
         screen = Wnck.Screen.get_default()
@@ -354,17 +545,17 @@ class Plugin(PluginBase):
     def _pin_icon(self, icon):
         desktop_path = icon.desktop_path
         if not desktop_path and icon.identifier:
-            desktop_path = self._find_desktop_path(icon.identifier)
+            desktop_path = self.desktop_index.find(icon.identifier)
             icon.desktop_path = desktop_path
 
         if desktop_path and desktop_path not in self.settings["pinned"]:
             self.settings["pinned"].append(desktop_path)
             self.save_settings()
             icon.pinned = True
-            self.dock.drawing_area.queue_draw()
-            log(f"[PIN] Закреплён: {desktop_path}")
+            self.queue_redraw()
+            log("[PIN] Закреплён: %s", desktop_path)
         else:
-            log(f"[PIN] Не удалось найти .desktop для {icon.name} (identifier={icon.identifier})")
+            log("[PIN] Не удалось найти .desktop для %s (identifier=%s)", icon.name, icon.identifier)
 
     def _unpin_icon(self, icon):
         if icon.desktop_path in self.settings["pinned"]:
@@ -372,51 +563,12 @@ class Plugin(PluginBase):
             self.save_settings()
             icon.pinned = False
 
-            if not icon.running_windows:
-                self.icon_list.icons.remove(icon)
-                self.dock.update_geometry()
+            if not icon.is_running():
+                self.icon_list.remove_icon(icon)
+                self.queue_layout()
 
-            self.dock.drawing_area.queue_draw()
+            self.queue_redraw()
 
     def _open_settings(self):
         log("[SETTINGS] Open settings dialog")
         # TODO: реализовать диалог настроек
-
-    def _find_desktop_path(self, identifier):
-        if not identifier:
-            return None
-
-        desktop_paths = [
-            os.path.expanduser("~/.local/share/applications"),
-            "/usr/share/applications",
-            "/usr/local/share/applications",
-            GLib.get_user_special_dir(GLib.UserDirectory.DIRECTORY_DESKTOP),
-        ]
-
-        desktop_paths = [p for p in desktop_paths if p]
-
-        for base_path in desktop_paths:
-            if not os.path.exists(base_path):
-                continue
-
-            for filename in os.listdir(base_path):
-                if filename.endswith(".desktop"):
-                    filepath = os.path.join(base_path, filename)
-                    try:
-                        keyfile = GLib.KeyFile()
-                        keyfile.load_from_file(filepath, GLib.KeyFileFlags.NONE)
-
-                        try:
-                            wm_class = keyfile.get_string("Desktop Entry", "StartupWMClass")
-                            if wm_class and wm_class.lower() == identifier.lower():
-                                return filepath
-                        except:
-                            pass
-
-                        if filename.replace(".desktop", "").lower() == identifier.lower():
-                            return filepath
-
-                    except:
-                        continue
-
-        return None
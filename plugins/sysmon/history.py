@@ -0,0 +1,85 @@
+# plugins/sysmon/history.py
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class MetricHistory:
+    def __init__(self, capacity=120):
+        self.capacity = max(1, int(capacity))
+        self._data = array("f", bytes(4 * self.capacity))
+        self._head = 0  # index of the next write
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        self._data[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def values(self):
+        # Oldest first; two slices of the backing array, no per-sample Python work
+        if self._count < self.capacity:
+            return self._data[:self._count]
+        return self._data[self._head:] + self._data[:self._head]
+
+    # Downsample to at most `width` (min, max) pairs in one pass, newest last
+    def columns(self, width):
+        count = self._count
+        width = int(width)
+        if count == 0 or width <= 0:
+            return [], []
+
+        values = self.values()
+        if count <= width:
+            return values, values
+
+        # Drop the oldest samples that do not fill a whole column
+        per_column = count // width
+        start = count - per_column * width
+
+        if np is not None:
+            block = np.frombuffer(values, dtype=np.float32)[start:].reshape(width, per_column)
+            return block.min(axis=1).tolist(), block.max(axis=1).tolist()
+
+        lows, highs = [], []
+        for i in range(start, count, per_column):
+            chunk = values[i:i + per_column]
+            lows.append(min(chunk))
+            highs.append(max(chunk))
+        return lows, highs
+
+
+def build_graph_path(cr, lows, highs, x, y, width, height, max_value=100.0, filled=False):
+    n = len(highs)
+    if n == 0:
+        return False
+
+    scale = height / max_value
+    step = width / n
+    top = [y + height - min(max_value, max(0.0, v)) * scale for v in highs]
+
+    if filled:
+        cr.move_to(x, y + height)
+        for i, ty in enumerate(top):
+            cr.line_to(x + i * step, ty)
+            cr.line_to(x + (i + 1) * step, ty)
+        cr.line_to(x + n * step, y + height)
+    else:
+        # Min/max envelope: along the maxima, then back along the minima
+        bottom = [y + height - min(max_value, max(0.0, v)) * scale for v in lows]
+        cr.move_to(x, top[0])
+        for i, ty in enumerate(top):
+            cr.line_to(x + (i + 0.5) * step, ty)
+        for i in range(n - 1, -1, -1):
+            cr.line_to(x + (i + 0.5) * step, max(bottom[i], top[i] + 1))
+        cr.line_to(x, max(bottom[0], top[0] + 1))
+    cr.close_path()
+    return True
@@ -1,9 +1,9 @@
-import gi
-gi.require_version('PangoCairo', '1.0')
-from gi.repository import Pango, PangoCairo, GLib
+import os
+from gi.repository import GLib
 from core.plugin_base import PluginBase
-import psutil
-import cairo
+from .sensors import TemperatureSensor
+from .history import MetricHistory, build_graph_path
+from .procstat import create_reader
 
 class Plugin(PluginBase):
     name = "SysMon"
@@ -17,19 +17,45 @@ class Plugin(PluginBase):
         "show_cpu": True,
         "show_ram": True,
         "show_temp": True,
+        "show_load": False,
+        "load_label": "LA",
+        "temp_sensor": "",
+        "temp_mode": "auto",
         "font_face": "DejaVu Sans Mono Book",
         "font_size": 10,
         "text_color": [1.0, 1.0, 1.0],
+        "graph_color": [0.29, 0.56, 0.88],
+        "display_mode": "text",  # "text", "sparkline", "bars" or "cores"
+        "graph_width": 32,
+        "core_bar_width": 2,
+        "history_size": 120,
         "update_interval_ms": 1000
     }
 
+    # Graph value range per metric
+    GRAPH_MAX = {"cpu": 100.0, "ram": 100.0, "temp": 100.0, "load": 1.0}
+    GRAPH_GAP = 4
+    CORE_BAR_GAP = 1
+    SEGMENT_GAP = 8
+
     def __init__(self, dock):
         super().__init__(dock)
         self._cached_text = ""
+        self._parts = []  # (metric, text)
         self._last_width = 0
+        self._reader = create_reader()
+        self._core_percents = []
+        self._graph_max = dict(self.GRAPH_MAX)
+        self._graph_max["load"] = float(os.cpu_count() or 1)
+        history_size = self.settings.get("history_size", 120)
+        self._histories = {key: MetricHistory(history_size) for key in self.GRAPH_MAX}
+        self._sensor = TemperatureSensor(
+            self.settings.get("temp_sensor", ""),
+            self.settings.get("temp_mode", "auto"),
+        )
         self._read_data()
         interval = self.settings.get("update_interval_ms", 1000)
-        GLib.timeout_add(interval, self._update)
+        self.add_timer(interval, self._update, tolerance_ms=interval // 4)
 
     def _update(self):
         old_text = self._cached_text
@@ -37,60 +63,88 @@ class Plugin(PluginBase):
 
         self._read_data()
 
-        if self._cached_text != old_text or self._text_width != old_width:
-            self.dock.update_geometry()
-            self.dock.drawing_area.queue_draw()
+        if self._text_width != old_width:
+            self.queue_layout()
+        if self._cached_text != old_text or self._graph_mode():
+            self.queue_redraw()
 
         return GLib.SOURCE_CONTINUE
 
+    def unload(self):
+        super().unload()
+        self._sensor.close()
+        self._reader.close()
+
+    def get_diagnostics(self):
+        return {f"temp_{key}": value for key, value in self._sensor.stats.items()}
+
+    def _graph_mode(self):
+        return self.settings.get("display_mode", "text") in ("sparkline", "bars", "cores")
+
+    def _graph_width(self, metric):
+        if self.settings.get("display_mode") != "cores":
+            return self.settings.get("graph_width", 32)
+        if metric != "cpu" or not self._core_percents:
+            return 0
+        bar_w = self.settings.get("core_bar_width", 2)
+        return len(self._core_percents) * (bar_w + self.CORE_BAR_GAP) - self.CORE_BAR_GAP
+
     def _read_data(self):
         parts = []
 
-        if self.settings.get("show_cpu", True):
-            cpu = psutil.cpu_percent(interval=None)
+        if self.settings.get("show_cpu", True) and self._reader.available:
+            cpu, self._core_percents = self._reader.cpu_percent()
+            self._histories["cpu"].append(cpu)
             label = self.settings.get("cpu_label", "CPU")
-            parts.append(f"{label}: {int(cpu):3}%")
+            parts.append(("cpu", f"{label}: {int(cpu):3}%"))
 
-        if self.settings.get("show_ram", True):
-            ram = psutil.virtual_memory().percent
+        if self.settings.get("show_ram", True) and self._reader.available:
+            ram = self._reader.memory_percent()
+            self._histories["ram"].append(ram)
             label = self.settings.get("ram_label", "RAM")
-            parts.append(f"{label}: {int(ram):3}%")
+            parts.append(("ram", f"{label}: {int(ram):3}%"))
 
         if self.settings.get("show_temp", True):
             temp = self._get_cpu_temp()
             if temp is not None:
+                self._histories["temp"].append(temp)
                 label = self.settings.get("temp_label", "T")
-                parts.append(f"{label}: {int(temp):3}°")
-
-        self._cached_text = " | ".join(parts)
-
-        if self._cached_text.strip():
-            dummy_surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
-            dummy_cr = cairo.Context(dummy_surface)
-            layout = PangoCairo.create_layout(dummy_cr)
-            font_desc = Pango.FontDescription()
-            font_desc.set_family(self.settings["font_face"])
-            font_desc.set_size(int(self.settings["font_size"]) * Pango.SCALE)
-            layout.set_font_description(font_desc)
-            layout.set_text(self._cached_text, -1)
-            self._text_width = layout.get_pixel_size()[0] + 16
-        else:
+                parts.append(("temp", f"{label}: {int(temp):3}°"))
+
+        if self.settings.get("show_load", False):
+            load = self._reader.load_average()[0]
+            self._histories["load"].append(load)
+            label = self.settings.get("load_label", "LA")
+            parts.append(("load", f"{label}: {load:.2f}"))
+
+        self._parts = parts
+        self._cached_text = " | ".join(text for _metric, text in parts)
+
+        if not self._cached_text.strip():
             self._text_width = 160
+        elif self._graph_mode():
+            self._text_width = self._segments_width() + 16
+        else:
+            text_w, _text_h = self.dock.text_service.measure(
+                self._cached_text, self.settings["font_face"], self.settings["font_size"]
+            )
+            self._text_width = text_w + 16
+
+    def _segments_width(self):
+        text_service = self.dock.text_service
+        font_face = self.settings["font_face"]
+        font_size = self.settings["font_size"]
+
+        width = 0
+        for metric, text in self._parts:
+            width += text_service.measure(text, font_face, font_size)[0]
+            graph_w = self._graph_width(metric)
+            if graph_w:
+                width += self.GRAPH_GAP + graph_w
+        return width + self.SEGMENT_GAP * (len(self._parts) - 1)
 
     def _get_cpu_temp(self):
-        try:
-            temps = psutil.sensors_temperatures()
-            if 'coretemp' in temps:
-                return int(temps['coretemp'][0].current)
-            elif 'k10temp' in temps:  # AMD
-                return int(temps['k10temp'][0].current)
-            else:
-                for name, entries in temps.items():
-                    if entries:
-                        return int(entries[0].current)
-        except Exception:
-            pass
-        return None
+        return self._sensor.read()
 
     def get_preferred_size(self) -> tuple[int, int]:
         width = max(16, self._text_width)
@@ -104,16 +158,60 @@ class Plugin(PluginBase):
         color = self.settings.get("text_color", [1.0, 1.0, 1.0])
         cr.set_source_rgb(*color[:3])
 
-        layout = PangoCairo.create_layout(cr)
-        font_desc = Pango.FontDescription()
-        font_desc.set_family(self.settings["font_face"])
-        font_desc.set_size(int(self.settings["font_size"]) * Pango.SCALE)
-        layout.set_font_description(font_desc)
-        layout.set_text(self._cached_text, -1)
+        text_service = self.dock.text_service
+        font_face = self.settings["font_face"]
+        font_size = self.settings["font_size"]
 
-        text_w, text_h = layout.get_pixel_size()
+        if self._graph_mode():
+            self._draw_segments(cr, width, height, color)
+            return
+
+        text_w, text_h = text_service.measure(self._cached_text, font_face, font_size)
         x = max(0, (width - text_w) // 2)
         y = max(0, (height - text_h) // 2)
 
-        cr.move_to(x, y)
-        PangoCairo.show_layout(cr, layout)
\ No newline at end of file
+        text_service.show(cr, x, y, self._cached_text, font_face, font_size)
+
+    def _draw_segments(self, cr, width, height, color):
+        text_service = self.dock.text_service
+        font_face = self.settings["font_face"]
+        font_size = self.settings["font_size"]
+        graph_color = self.settings.get("graph_color", [0.29, 0.56, 0.88])
+        mode = self.settings.get("display_mode")
+        filled = mode == "bars"
+        graph_y = 2
+        graph_h = max(1, height - 4)
+
+        x = max(0, (width - self._segments_width()) // 2)
+        for metric, text in self._parts:
+            text_w, text_h = text_service.measure(text, font_face, font_size)
+            cr.set_source_rgb(*color[:3])
+            text_service.show(cr, x, max(0, (height - text_h) // 2), text, font_face, font_size)
+            x += text_w
+
+            graph_w = self._graph_width(metric)
+            if not graph_w:
+                x += self.SEGMENT_GAP
+                continue
+            x += self.GRAPH_GAP
+
+            if mode == "cores":
+                self._build_core_bars_path(cr, x, graph_y, graph_h)
+                cr.set_source_rgb(*graph_color[:3])
+                cr.fill()
+            else:
+                lows, highs = self._histories[metric].columns(graph_w)
+                # Right-align the history so the newest sample sits next to the next label
+                graph_x = x + graph_w - len(highs)
+                if build_graph_path(cr, lows, highs, graph_x, graph_y, len(highs), graph_h,
+                                    self._graph_max[metric], filled):
+                    cr.set_source_rgb(*graph_color[:3])
+                    cr.fill()
+            x += graph_w + self.SEGMENT_GAP
+
+    def _build_core_bars_path(self, cr, x, y, height):
+        bar_w = self.settings.get("core_bar_width", 2)
+        step = bar_w + self.CORE_BAR_GAP
+        for i, percent in enumerate(self._core_percents):
+            bar_h = max(1.0, min(100.0, percent) * height / 100.0)
+            cr.rectangle(x + i * step, y + height - bar_h, bar_w, bar_h)
\ No newline at end of file
@@ -0,0 +1,125 @@
+# plugins/sysmon/procstat.py
+
+import os
+from core.utils import log
+
+
+class ProcStatReader:
+    available = True
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+        self._fds = {}
+        self._buf = bytearray(16384)
+        self._prev_cpu = None  # [(busy, total)] for the aggregate line, then each core
+        for name in ("stat", "meminfo", "loadavg"):
+            self._fds[name] = os.open(os.path.join(proc_root, name), os.O_RDONLY | os.O_CLOEXEC)
+
+    def close(self):
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = {}
+
+    def _read(self, name):
+        fd = self._fds[name]
+        while True:
+            n = os.preadv(fd, [self._buf], 0)
+            if n < len(self._buf):
+                return self._buf[:n]
+            # Hosts with many cores outgrow the buffer; grow once and reuse it afterwards
+            self._buf = bytearray(len(self._buf) * 2)
+
+    def cpu_percent(self):
+        samples = []
+        for line in self._read("stat").split(b"\n"):
+            if not line.startswith(b"cpu"):
+                break
+            # user nice system idle iowait irq softirq steal (guest time is already in user)
+            fields = [int(v) for v in line.split()[1:9]]
+            idle = fields[3] + fields[4]
+            total = sum(fields)
+            samples.append((total - idle, total))
+
+        prev = self._prev_cpu
+        self._prev_cpu = samples
+        if prev is None or len(prev) != len(samples):
+            return 0.0, [0.0] * (len(samples) - 1)
+
+        percents = []
+        for (busy, total), (prev_busy, prev_total) in zip(samples, prev):
+            delta = total - prev_total
+            percents.append(100.0 * (busy - prev_busy) / delta if delta > 0 else 0.0)
+        return percents[0], percents[1:]
+
+    def memory_percent(self):
+        total = available = None
+        for line in self._read("meminfo").split(b"\n"):
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1])
+            if total is not None and available is not None:
+                break
+        if not total or available is None:
+            return 0.0
+        return 100.0 * (total - available) / total
+
+    def load_average(self):
+        return tuple(float(v) for v in self._read("loadavg").split()[:3])
+
+
+class PsutilReader:
+    available = True
+
+    def __init__(self):
+        import psutil
+        self._psutil = psutil
+        psutil.cpu_percent(interval=None, percpu=True)
+
+    def close(self):
+        pass
+
+    def cpu_percent(self):
+        cores = self._psutil.cpu_percent(interval=None, percpu=True)
+        return (sum(cores) / len(cores) if cores else 0.0), cores
+
+    def memory_percent(self):
+        return self._psutil.virtual_memory().percent
+
+    def load_average(self):
+        return os.getloadavg()
+
+
+class NullReader:
+    # Neither /proc nor psutil: the plugin hides CPU and RAM, load still comes from libc
+    available = False
+
+    def close(self):
+        pass
+
+    def cpu_percent(self):
+        return 0.0, []
+
+    def memory_percent(self):
+        return 0.0
+
+    def load_average(self):
+        try:
+            return os.getloadavg()
+        except OSError:
+            return 0.0, 0.0, 0.0
+
+
+def create_reader(proc_root="/proc"):
+    try:
+        return ProcStatReader(proc_root)
+    except OSError as e:
+        log("[SYSMON] /proc is not readable (%s), falling back to psutil", e, level="WARNING")
+    try:
+        return PsutilReader()
+    except ImportError as e:
+        log("[SYSMON] psutil is not available (%s), CPU and RAM are disabled", e, level="WARNING")
+    return NullReader()
@@ -0,0 +1,151 @@
+# plugins/sysmon/sensors.py
+
+import glob
+import os
+import time
+from core.utils import log
+
+# CPU sensor chips in order of preference
+_PREFERRED_CHIPS = ("coretemp", "k10temp", "zenpower", "cpu_thermal", "soc_thermal", "acpitz")
+# Labels that carry the whole-package reading on multi-sensor chips
+_PACKAGE_LABELS = ("package id", "tctl", "tdie", "cpu")
+# thermal_zone types used when no hwmon chip is available
+_PREFERRED_ZONES = ("x86_pkg_temp", "cpu-thermal", "soc-thermal", "acpitz")
+# How long to wait before walking sysfs again after finding nothing
+_RETRY_DISCOVERY_S = 60
+
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+class TemperatureSensor:
+    def __init__(self, override="", mode="auto", sysfs_root="/sys/class"):
+        self.override = override.strip()
+        self.mode = mode
+        self.sysfs_root = sysfs_root
+        self.paths = []
+        self._fds = []
+        self._retry_at = 0
+        self.stats = {
+            "discoveries": 0,
+            "reads": 0,
+            "read_errors": 0,
+        }
+
+    def read(self):
+        if not self._fds and not self._open():
+            return None
+
+        self.stats["reads"] += 1
+        try:
+            return self._read_fds()
+        except (OSError, ValueError) as e:
+            self.stats["read_errors"] += 1
+            log("[SYSMON] Sensor read failed, rediscovering: %s", e, level="WARNING")
+
+        self.close()
+        if not self._open():
+            return None
+        try:
+            return self._read_fds()
+        except (OSError, ValueError):
+            self.close()
+            return None
+
+    def close(self):
+        for fd in self._fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = []
+
+    def _read_fds(self):
+        values = [int(os.pread(fd, 16, 0)) for fd in self._fds]
+        return max(values) // 1000
+
+    def _open(self):
+        if time.monotonic() < self._retry_at:
+            return False
+
+        self.paths = self.discover()
+        for path in self.paths:
+            try:
+                self._fds.append(os.open(path, os.O_RDONLY | os.O_CLOEXEC))
+            except OSError as e:
+                log("[SYSMON] Cannot open sensor %s: %s", path, e, level="WARNING")
+        if not self._fds:
+            self._retry_at = time.monotonic() + _RETRY_DISCOVERY_S
+            return False
+        log("[SYSMON] Temperature sensors: %s", self.paths, level="INFO")
+        return True
+
+    def discover(self):
+        self.stats["discoveries"] += 1
+
+        if self.override.startswith("/"):
+            return [self.override]
+
+        chips = self._hwmon_chips()
+
+        if self.override:
+            chip_name, _sep, label = self.override.partition("/")
+            for name, inputs in chips:
+                if name != chip_name.lower():
+                    continue
+                if not label:
+                    return self._pick_inputs(inputs)
+                for input_label, path in inputs:
+                    if input_label == label.lower():
+                        return [path]
+            log("[SYSMON] Sensor override not found: %s", self.override, level="WARNING")
+
+        for preferred in _PREFERRED_CHIPS:
+            for name, inputs in chips:
+                if name == preferred and inputs:
+                    return self._pick_inputs(inputs)
+
+        for name, inputs in chips:
+            if inputs:
+                return self._pick_inputs(inputs)
+
+        return self._thermal_zones()
+
+    def _pick_inputs(self, inputs):
+        if self.mode == "max":
+            return [path for _label, path in inputs]
+        for input_label, path in inputs:
+            if input_label.startswith(_PACKAGE_LABELS):
+                return [path]
+        return [inputs[0][1]]
+
+    def _hwmon_chips(self):
+        chips = []
+        for hwmon in sorted(glob.glob(os.path.join(self.sysfs_root, "hwmon", "hwmon*"))):
+            name = _read_text(os.path.join(hwmon, "name")).lower()
+            inputs = []
+            for path in sorted(glob.glob(os.path.join(hwmon, "temp*_input"))):
+                label = _read_text(path[:-len("_input")] + "_label").lower()
+                inputs.append((label, path))
+            chips.append((name, inputs))
+        return chips
+
+    def _thermal_zones(self):
+        zones = []
+        for zone in sorted(glob.glob(os.path.join(self.sysfs_root, "thermal", "thermal_zone*"))):
+            zone_type = _read_text(os.path.join(zone, "type")).lower()
+            zones.append((zone_type, os.path.join(zone, "temp")))
+
+        for preferred in _PREFERRED_ZONES:
+            for zone_type, path in zones:
+                if zone_type == preferred:
+                    return [path]
+
+        if zones and self.mode == "max":
+            return [path for _zone_type, path in zones]
+        return [zones[0][1]] if zones else []
@@ -0,0 +1,115 @@
+import pytest
+
+gi = pytest.importorskip("gi")
+try:
+    gi.require_version("Gtk", "3.0")
+    gi.require_version("PangoCairo", "1.0")
+    from gi.repository import GLib
+    from plugins.battery_status.plugin import Plugin
+except (ImportError, ValueError) as e:
+    pytest.skip(f"GTK typelibs are not available: {e}", allow_module_level=True)
+
+
+class FakeUeventSource:
+    def __init__(self, callback):
+        self.callback = callback
+        self.closed = False
+
+    def start(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def emit(self, **props):
+        self.callback({"SUBSYSTEM": "power_supply", **props})
+
+
+class FakeTimers:
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, period_ms, callback, tolerance_ms=0, owner=None, early_ms=None):
+        self.subscriptions.append(period_ms)
+
+    def release(self, owner):
+        pass
+
+
+class FakeTextService:
+    def measure(self, text, font_face, font_size, absolute=False):
+        return (8 * len(text), 14)
+
+
+class FakeDock:
+    def __init__(self):
+        self.timers = FakeTimers()
+        self.text_service = FakeTextService()
+        self.redraws = 0
+        self.layouts = 0
+
+    def queue_redraw(self, plugin=None, area=None):
+        self.redraws += 1
+
+    def queue_layout(self):
+        self.layouts += 1
+
+
+def write_supply(root, name, **attrs):
+    path = root / name
+    path.mkdir(exist_ok=True)
+    for attr, value in attrs.items():
+        (path / attr).write_text(f"{value}\n")
+
+
+def run_idle():
+    context = GLib.MainContext.default()
+    while context.iteration(False):
+        pass
+
+
+@pytest.fixture
+def battery(tmp_path, monkeypatch):
+    write_supply(tmp_path, "BAT0", type="Battery", present=1, status="Discharging", capacity=80)
+    write_supply(tmp_path, "AC", type="Mains", online=0)
+    monkeypatch.setattr(Plugin, "_load_settings", lambda self: setattr(self, "settings", dict(self.default_settings)))
+    monkeypatch.setattr(Plugin, "uevent_source_factory", FakeUeventSource)
+    monkeypatch.setattr(Plugin, "sysfs_root", str(tmp_path))
+
+    dock = FakeDock()
+    plugin = Plugin(dock)
+    yield plugin, dock, tmp_path
+    plugin.unload()
+
+
+def test_change_event_updates_state_and_redraws(battery):
+    plugin, dock, root = battery
+    assert plugin._info["status"] == "Discharging"
+    assert plugin._info["capacity"] == 80
+    # Only the safety poll, not the 1 s fallback
+    assert dock.timers.subscriptions == [plugin.default_settings["safety_poll_interval_ms"]]
+
+    write_supply(root, "BAT0", status="Charging", capacity=81)
+    write_supply(root, "AC", online=1)
+    redraws = dock.redraws
+    plugin._uevents.emit(ACTION="change", DEVPATH="/devices/BAT0")
+    plugin._uevents.emit(ACTION="change", DEVPATH="/devices/AC")
+    assert dock.redraws == redraws  # refreshed from an idle callback, once for the burst
+    run_idle()
+
+    assert plugin._info["status"] == "Charging"
+    assert plugin._info["capacity"] == 81
+    assert plugin._info["ac_online"]
+    assert plugin._level_text == "81%"
+    assert dock.redraws == redraws + 1
+
+
+def test_add_event_rediscovers_batteries(battery):
+    plugin, dock, root = battery
+    write_supply(root, "BAT1", type="Battery", present=1, status="Discharging", capacity=40)
+
+    plugin._uevents.emit(ACTION="add", DEVPATH="/devices/BAT1")
+    run_idle()
+
+    assert plugin._info["batteries"] == 2
+    assert plugin._info["capacity"] == 60
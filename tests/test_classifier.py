@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from plugins.icon_panel.classifier import WindowClassifier
+
+
+class FakeClassGroup:
+    def __init__(self, res_class, res_name):
+        self.res_class = res_class
+        self.res_name = res_name
+
+    def get_res_class(self):
+        return self.res_class
+
+    def get_name(self):
+        return self.res_name
+
+
+class FakeWindow:
+    def __init__(self, xid, res_class, res_name="", title="", pid=0):
+        self.xid = xid
+        self.class_group = FakeClassGroup(res_class, res_name)
+        self.title = title
+        self.pid = pid
+
+    def get_class_group(self):
+        return self.class_group
+
+    def get_name(self):
+        return self.title
+
+    def get_xid(self):
+        return self.xid
+
+    def get_pid(self):
+        return self.pid
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    return WindowClassifier(rules_path=str(tmp_path / "missing.json"))
+
+
+def test_unclaimed_window_uses_normalized_res_class(classifier):
+    assert classifier.classify(FakeWindow(1, "Firefox-bin")) == "firefox"
+    assert classifier.classify(FakeWindow(2, "Gimp-2.10")) == "gimp-2.10"
+
+
+def test_libreoffice_modules(classifier):
+    assert classifier.classify(FakeWindow(1, "libreoffice", "libreoffice-calc")) == "libreoffice-calc"
+    # The start center has no module in res_name; the title names the document type
+    assert classifier.classify(FakeWindow(2, "soffice", "soffice", "Untitled 1 - LibreOffice Impress")) == "libreoffice-impress"
+    assert classifier.classify(FakeWindow(3, "soffice", "soffice", "LibreOffice")) == "libreoffice-writer"
+
+
+def test_title_is_read_only_for_classes_with_title_rules(classifier):
+    assert classifier.uses_title("soffice")
+    assert not classifier.uses_title("firefox")
+
+
+def test_user_rules_come_first(tmp_path):
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps([
+        {"res_class": "soffice", "title": "Impress", "identifier": "slides"},
+        {"res_class": "kitty", "title": r"^(?P<session>\w+):", "identifier": "kitty-{session}"},
+        {"res_class": "broken", "title": "(", "identifier": "never"},
+    ]))
+    classifier = WindowClassifier(rules_path=str(rules_path))
+
+    assert classifier.classify(FakeWindow(1, "soffice", "soffice", "Talk - LibreOffice Impress")) == "slides"
+    assert classifier.classify(FakeWindow(2, "kitty", "kitty", "work: vim")) == "kitty-work"
+    assert classifier.classify(FakeWindow(3, "kitty", "kitty", "no session")) == "kitty"
+    # The rule with the invalid regex is skipped, the others still load
+    assert classifier.classify(FakeWindow(4, "broken", "broken", "(")) == "broken"
+
+
+def test_invalid_rules_file_falls_back_to_builtin(tmp_path):
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text("{not json")
+    classifier = WindowClassifier(rules_path=str(rules_path))
+    assert classifier.classify(FakeWindow(1, "libreoffice", "libreoffice-draw")) == "libreoffice-draw"
+
+
+def test_memo_until_inputs_change(classifier):
+    window = FakeWindow(1, "soffice", "soffice", "LibreOffice")
+    assert classifier.classify(window) == "libreoffice-writer"
+    assert classifier.classify(window) == "libreoffice-writer"
+    assert classifier.get_stats()["memo_hits"] == 1
+
+    window.title = "Budget - LibreOffice Calc"
+    assert classifier.classify(window) == "libreoffice-calc"
+    assert classifier.get_stats()["classified"] == 2
+
+    classifier.forget(window)
+    assert classifier.get_stats()["memoized"] == 0
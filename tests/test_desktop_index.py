@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+pytest.importorskip("gi")
+from gi.repository import Gio
+from core.config_store import config_store
+from plugins.icon_panel.desktop_index import DesktopIndex
+
+
+def write_entry(path, wm_class="", name="App"):
+    path.write_text(f"[Desktop Entry]\nType=Application\nName={name}\nExec=app\nIcon=app\nStartupWMClass={wm_class}\n")
+
+
+def file_event(index, path, event_type):
+    index._on_file_changed(None, Gio.File.new_for_path(str(path)), None, event_type, str(path.parent))
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    user = tmp_path / "user"
+    system = tmp_path / "system"
+    user.mkdir()
+    system.mkdir()
+    write_entry(system / "editor.desktop", wm_class="Editor")
+    write_entry(system / "viewer.desktop", wm_class="ImgView")
+    return user, system, str(tmp_path / "cache" / "desktop_index.json")
+
+
+def open_index(dirs):
+    user, system, cache_path = dirs
+    index = DesktopIndex(cache_path, [str(user), str(system)])
+    config_store.flush()
+    return index
+
+
+def test_find_by_wm_class_and_basename(dirs):
+    index = open_index(dirs)
+    _user, system, _cache = dirs
+    assert index.find("imgview") == str(system / "viewer.desktop")
+    assert index.find("Viewer") == str(system / "viewer.desktop")
+    assert index.find("missing") is None
+
+
+def test_earlier_dir_takes_precedence(dirs):
+    user, system, _cache = dirs
+    write_entry(user / "editor.desktop", wm_class="Editor", name="Mine")
+    index = open_index(dirs)
+    assert index.find("editor") == str(user / "editor.desktop")
+
+
+def test_warm_start_parses_nothing(dirs):
+    open_index(dirs)
+    index = open_index(dirs)
+    stats = index.get_stats()
+    assert stats["cache_loaded"]
+    assert stats["dirs_scanned"] == 0
+    assert stats["files_parsed"] == 0
+    assert stats["entries"] == 2
+
+
+def test_edit_in_place_is_picked_up(dirs):
+    _user, system, _cache = dirs
+    open_index(dirs)
+
+    # Rewriting a file leaves the directory mtime alone; only the file fingerprint changes
+    dir_stat = os.stat(system)
+    write_entry(system / "viewer.desktop", wm_class="PhotoView")
+    os.utime(system, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+    index = open_index(dirs)
+    assert index.get_stats()["files_parsed"] == 1
+    assert index.find("photoview") == str(system / "viewer.desktop")
+    assert index.find("imgview") is None
+
+
+def test_file_events_update_the_keys(dirs):
+    user, system, _cache = dirs
+    index = open_index(dirs)
+
+    write_entry(user / "editor.desktop", wm_class="Editor")
+    file_event(index, user / "editor.desktop", Gio.FileMonitorEvent.CREATED)
+    assert index.find("editor") == str(user / "editor.desktop")
+
+    (user / "editor.desktop").unlink()
+    file_event(index, user / "editor.desktop", Gio.FileMonitorEvent.DELETED)
+    # The system entry wins again
+    assert index.find("editor") == str(system / "editor.desktop")
+
+    write_entry(system / "viewer.desktop", wm_class="PhotoView")
+    file_event(index, system / "viewer.desktop", Gio.FileMonitorEvent.CHANGES_DONE_HINT)
+    assert index.find("imgview") is None
+    assert index.find("photoview") == str(system / "viewer.desktop")
+    index.close()
@@ -0,0 +1,60 @@
+import pytest
+
+from plugins.sysmon import history
+from plugins.sysmon.history import MetricHistory
+
+
+@pytest.fixture(params=["numpy", "python"])
+def downsampling(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(history, "np", None)
+    return request.param
+
+
+def test_values_oldest_first_after_wrap():
+    h = MetricHistory(4)
+    for v in range(6):
+        h.append(v)
+    assert len(h) == 4
+    assert list(h.values()) == [2, 3, 4, 5]
+
+
+def test_partial_history():
+    h = MetricHistory(4)
+    h.append(1)
+    h.append(2)
+    assert list(h.values()) == [1, 2]
+
+
+def test_capacity_is_at_least_one():
+    h = MetricHistory(0)
+    h.append(7)
+    h.append(8)
+    assert list(h.values()) == [8]
+
+
+def test_columns_short_history_is_not_resampled(downsampling):
+    h = MetricHistory(10)
+    for v in (1, 2, 3):
+        h.append(v)
+    lows, highs = h.columns(5)
+    assert list(lows) == list(highs) == [1, 2, 3]
+
+
+def test_columns_min_max_per_column(downsampling):
+    h = MetricHistory(10)
+    for v in (9, 1, 5, 2, 8, 3, 7, 4, 6, 0):
+        h.append(v)
+    # 10 samples into 3 columns of 3: the oldest sample is dropped
+    lows, highs = h.columns(3)
+    assert list(lows) == [1, 3, 0]
+    assert list(highs) == [5, 8, 6]
+
+
+def test_columns_empty(downsampling):
+    assert MetricHistory(5).columns(3) == ([], [])
+    h = MetricHistory(5)
+    h.append(1)
+    assert h.columns(0) == ([], [])
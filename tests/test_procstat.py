@@ -0,0 +1,64 @@
+import sys
+
+import pytest
+
+from plugins.sysmon.procstat import NullReader, ProcStatReader, create_reader
+
+MEMINFO = "MemTotal:       8000000 kB\nMemFree:         1000000 kB\nMemAvailable:    2000000 kB\n"
+
+
+def write_stat(root, *cpus):
+    # cpus: (busy, idle) jiffies for the aggregate line, then each core
+    lines = []
+    for i, (busy, idle) in enumerate(cpus):
+        name = "cpu" if i == 0 else f"cpu{i - 1}"
+        lines.append(f"{name} {busy} 0 0 {idle} 0 0 0 0 0 0")
+    lines.append("intr 12345 0 0")
+    (root / "stat").write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def proc(tmp_path):
+    write_stat(tmp_path, (100, 900), (50, 450), (50, 450))
+    (tmp_path / "meminfo").write_text(MEMINFO)
+    (tmp_path / "loadavg").write_text("0.50 0.25 0.10 1/123 4567\n")
+    reader = ProcStatReader(str(tmp_path))
+    yield reader, tmp_path
+    reader.close()
+
+
+def test_cpu_percent_from_deltas(proc):
+    reader, root = proc
+    assert reader.cpu_percent() == (0.0, [0.0, 0.0])
+
+    # The descriptors stay open; a rewritten file is read again from offset 0
+    write_stat(root, (200, 1100), (100, 500), (100, 600))
+    total, cores = reader.cpu_percent()
+    assert total == pytest.approx(100 * 100 / 300)
+    assert cores == [pytest.approx(50.0), pytest.approx(100 * 50 / 200)]
+
+
+def test_memory_and_load(proc):
+    reader, _root = proc
+    assert reader.memory_percent() == pytest.approx(75.0)
+    assert reader.load_average() == (0.5, 0.25, 0.1)
+
+
+def test_large_stat_file_grows_the_buffer(proc):
+    reader, root = proc
+    cores = [(10, 90)] * 600
+    write_stat(root, (6000, 54000), *cores)
+    assert len((root / "stat").read_bytes()) > 16384
+    reader.cpu_percent()
+    write_stat(root, (6600, 54000), *[(11, 90)] * 600)
+    total, per_core = reader.cpu_percent()
+    assert total == pytest.approx(100.0)
+    assert len(per_core) == 600
+
+
+def test_create_reader_without_proc_or_psutil(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "psutil", None)
+    reader = create_reader(str(tmp_path / "missing"))
+    assert isinstance(reader, NullReader)
+    assert not reader.available
+    assert reader.cpu_percent() == (0.0, [])
@@ -0,0 +1,129 @@
+import pytest
+
+pytest.importorskip("gi")
+from core import timer_service
+from core.timer_service import TimerService
+
+
+class FakeLoop:
+    # Stands in for the GLib timeout sources; run() jumps the clock to the next wakeup
+    SOURCE_REMOVE = False
+
+    def __init__(self):
+        self.now = 0
+        self.source = None  # (fire_ms, callback, args, aligned)
+        self.next_id = 0
+
+    def timeout_add(self, delay_ms, callback, *args):
+        return self._add(self.now + delay_ms, callback, args, False)
+
+    def timeout_add_seconds(self, seconds, callback, *args):
+        # The worst case GLib allows: a quarter second early
+        return self._add(self.now + seconds * 1000 - 250, callback, args, True)
+
+    def source_remove(self, source_id):
+        assert self.source is not None and self.source[0] == source_id
+        self.source = None
+
+    def run(self):
+        source_id, fire_ms, callback, args, _aligned = self.source
+        self.source = None
+        self.now = fire_ms
+        callback(*args)
+
+    def _add(self, fire_ms, callback, args, aligned):
+        assert self.source is None, "one pending source at a time"
+        self.next_id += 1
+        self.source = (self.next_id, fire_ms, callback, args, aligned)
+        return self.next_id
+
+
+@pytest.fixture
+def loop(monkeypatch):
+    loop = FakeLoop()
+    monkeypatch.setattr(timer_service, "GLib", loop)
+    monkeypatch.setattr(timer_service, "_now_ms", lambda: loop.now)
+    return loop
+
+
+def recorder(loop, calls, name, keep=True):
+    def callback():
+        calls.append((name, loop.now))
+        return keep
+    return callback
+
+
+def test_tolerant_timers_share_wakeups(loop):
+    service = TimerService()
+    calls = []
+    service.subscribe(1000, recorder(loop, calls, "a"), tolerance_ms=200)
+    loop.now = 100
+    service.subscribe(1000, recorder(loop, calls, "b"), tolerance_ms=200)
+
+    for _ in range(3):
+        loop.run()
+
+    # One wakeup at the latest time a tolerates, b (due at 1100) rides along
+    assert calls == [("a", 1200), ("b", 1200), ("a", 2200), ("b", 2200), ("a", 3200), ("b", 3200)]
+    assert service.get_stats()["wakeups"] == 3
+
+
+def test_early_dispatch_keeps_the_schedule(loop):
+    service = TimerService()
+    calls = []
+    service.subscribe(1000, recorder(loop, calls, "exact"))
+    handle = service.subscribe(1000, recorder(loop, calls, "early"), tolerance_ms=250)
+    handle.due_ms = 1200
+
+    loop.run()
+    assert calls == [("exact", 1000), ("early", 1000)]
+    assert service.get_stats()["early_callbacks"] == 1
+    assert handle.due_ms == 2200
+
+
+def test_boundary_tick_never_runs_early(loop):
+    service = TimerService()
+    calls = []
+    service.subscribe(1000, recorder(loop, calls, "other"))
+    tick = service.subscribe(1000, recorder(loop, calls, "tick"), tolerance_ms=50, early_ms=0)
+    tick.defer(1100)
+
+    loop.run()
+    assert calls == [("other", 1000)]
+    loop.run()
+    name, at = calls[-1]
+    assert name == "tick" and 1100 <= at <= 1150
+
+
+def test_second_timeouts_only_when_the_tolerance_allows(loop):
+    service = TimerService()
+    service.subscribe(10000, lambda: True, tolerance_ms=5000)
+    assert loop.source[4]
+    loop.run()
+    assert loop.now >= 10000
+    assert service.get_stats()["aligned_wakeups"] == 1
+
+    service = TimerService()
+    loop.source = None
+    service.subscribe(10000, lambda: True, tolerance_ms=100)
+    assert not loop.source[4]
+
+
+def test_callback_false_unsubscribes(loop):
+    service = TimerService()
+    calls = []
+    service.subscribe(500, recorder(loop, calls, "once", keep=False))
+    loop.run()
+    assert calls == [("once", 500)]
+    assert loop.source is None
+    assert service.get_stats()["active"] == 0
+
+
+def test_stall_starts_over_from_now(loop):
+    service = TimerService()
+    calls = []
+    handle = service.subscribe(1000, recorder(loop, calls, "a"))
+    loop.source = (loop.source[0], 5500) + loop.source[2:]
+    loop.run()
+    assert calls == [("a", 5500)]
+    assert handle.due_ms == 6500